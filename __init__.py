@@ -48,9 +48,12 @@ import bpy # NOTE: the bpy import must come below the module reload code
 import pathlib
 import os
 from ramses_export import debug_utils
+from ramses_export import instrumentation
 from ramses_export import utils
 from ramses_export.ramses_inspector import RamsesInspector
 from ramses_export.exporter import RamsesBlenderExporter
+from ramses_export.exportable_scene import ExportableScene
+from ramses_export.budget import BudgetLimits
 from bpy_extras.io_utils import ExportHelper
 from bpy.types import (
     # NOTE: failing to import these will fail silently
@@ -73,6 +76,7 @@ def menu_func_export(self, context):
     """Sets up the entry in the export menu when appropriately registered
     in __init__.py"""
     self.layout.operator(RamsesExportOperator.bl_idname, text='RAMSES Scenes (.ramses, .ramres)')
+    self.layout.operator(RamsesEstimateOperator.bl_idname, text='RAMSES Scene Cost Estimate')
 
 
 class Mesh_ListItem(bpy.types.PropertyGroup):
@@ -102,6 +106,13 @@ class MeshUIList(UIList):
             layout.label("", icon = custom_icon)
 
 
+# Shared by the export and the estimate, so both default to the same node structure
+COMPACT_TRANSFORMS = bpy.props.BoolProperty(name='Compact transforms',
+                                            default=False,
+                                            description='Merge translation, rotation and scaling into as '
+                                            + 'few RAMSES nodes as possible, skipping identity transforms')
+
+
 class RamsesExportOperator(bpy.types.Operator):
     bl_idname = "export_scene.ramses"
     bl_label = "Export as RAMSES scenes"
@@ -143,6 +154,57 @@ class RamsesExportOperator(bpy.types.Operator):
 
     evaluate: bpy.props.BoolProperty(name='Evaluate modifiers & deformations', default=True)
 
+    streaming: bpy.props.BoolProperty(name='Stream view layers',
+                                      default=False,
+                                      description='Build and translate one view layer at a time, '
+                                      + 'lowering peak memory usage for large scenes')
+
+    compact_transforms: COMPACT_TRANSFORMS
+
+    parallel: bpy.props.BoolProperty(name='Export scenes in parallel',
+                                     default=False,
+                                     description='Build, validate and save every scene on a worker thread. '
+                                     + 'Cannot be combined with streaming')
+
+    optimize_render_order: bpy.props.BoolProperty(name='Optimize render order',
+                                                  default=False,
+                                                  description='Sort the meshes of every RenderGroup by shader and geometry. '
+                                                  + 'Collections with the custom property "ramses_keep_render_order" keep their order')
+
+    report_budget: bpy.props.BoolProperty(name='Report budget',
+                                          default=False,
+                                          description='Count vertices, triangles, draw calls, RenderGroups, nodes and '
+                                          + 'resource bytes per mesh, collection and view layer, writing them '
+                                          + 'to <scene>_budget.json next to the exported scenes')
+
+    budget_file: bpy.props.StringProperty(name='Budget limits',
+                                          default='',
+                                          description='JSON file with hard limits such as "max_triangles" or '
+                                          + '"max_draw_calls". Scenes over budget fail the export before being saved',
+                                          subtype='FILE_PATH')
+
+    record_timings: bpy.props.BoolProperty(name='Record timings',
+                                           default=False,
+                                           description='Time every phase of the export, writing the results '
+                                           + 'to export_timings.json next to the exported scenes')
+
+    record_trace: bpy.props.BoolProperty(name='Record trace',
+                                         default=False,
+                                         description='Write a timeline of the export to export_trace.json, '
+                                         + 'viewable in chrome://tracing or Perfetto')
+
+    profile: bpy.props.BoolProperty(name='Profile',
+                                    default=False,
+                                    description='Run the export under cProfile and tracemalloc, writing '
+                                    + 'export.prof and reports of the slowest functions and largest allocations')
+
+    validation_level: bpy.props.EnumProperty(name='Validation',
+                                             items=[(ExportableScene.VALIDATION_FULL, 'Full', 'Fail on any issue RAMSES reports'),
+                                                    (ExportableScene.VALIDATION_ERRORS, 'Errors only', 'Ignore warnings'),
+                                                    (ExportableScene.VALIDATION_OFF, 'Off', 'Do not validate the scenes')],
+                                             default=ExportableScene.VALIDATION_FULL,
+                                             description='How thoroughly to check the exported scenes')
+
     def glsl_list_init(self):
         # Populate the GLSL UI list as soon as the fileselect window opens
         for _object in bpy.data.objects:
@@ -182,26 +244,57 @@ class RamsesExportOperator(bpy.types.Operator):
     def execute(self, context):
         # Execute is called once the 'Export as RAMSES Scenes' button is clicked
         # so, the perfect place to set up any extra state we want before processing
+        if self.streaming and self.parallel:
+            self.report({'ERROR'}, 'Streaming view layers cannot be combined with exporting scenes in parallel.')
+            return {'CANCELLED'}
+
         params = self.get_CustomParams()
 
         if self.emit_debug_files and not debug_utils.debug_logger_set:
             debug_utils.setup_logging(f'{self.directory}debug.txt') # Master log file
             debug_utils.debug_logger_set = True
 
-        exporter = RamsesBlenderExporter(bpy.data.scenes)
-        exporter.extract_from_blender_scene(params, self.evaluate)
-        exporter.build_from_extracted_representations()
+        recording = self.record_timings or self.record_trace
+        timings = instrumentation.TimingRecorder(trace=self.record_trace) if recording else None
 
-        for exportable_scene in exporter.get_exportable_scenes():
+        profiler = instrumentation.ExportProfiler() if self.profile else None
 
-            exportable_scene.set_output_dir(self.directory)
-            inspector = RamsesInspector(exportable_scene, addon_dir=utils.get_addon_path())
+        budget_limits = BudgetLimits.load(bpy.path.abspath(self.budget_file)) if self.budget_file else None
+
+        with instrumentation.activate(timings, profiler):
+            exporter = RamsesBlenderExporter(bpy.data.scenes,
+                                             streaming=self.streaming,
+                                             compact_transforms=self.compact_transforms,
+                                             validation_level=self.validation_level,
+                                             parallel=self.parallel,
+                                             optimize_render_order=self.optimize_render_order,
+                                             collect_budget=self.report_budget,
+                                             budget_limits=budget_limits)
+            exporter.extract_from_blender_scene(params, self.evaluate)
+            # Also validates and saves every scene, possibly in parallel
+            exporter.build_from_extracted_representations(output_dir=self.directory)
+
+        if self.record_timings:
+            timings.save(os.path.join(self.directory, 'export_timings.json'))
+            self.report({'INFO'}, timings.summary())
+
+        if self.record_trace:
+            timings.save_trace(os.path.join(self.directory, 'export_trace.json'))
 
-            if not exportable_scene.is_valid():
-                validation_report = exportable_scene.get_validation_report()
-                raise RuntimeError(validation_report)
+        if profiler:
+            profiler.save(self.directory)
+            self.report({'INFO'}, f'Wrote profiling reports to {self.directory}')
 
-            exportable_scene.save()
+        for exportable_scene in exporter.get_exportable_scenes():
+            if exportable_scene.render_order:
+                self.report({'INFO'}, f'{exportable_scene.scene_representation.name}: {exportable_scene.render_order.summary()}')
+
+            if self.report_budget:
+                budget = exportable_scene.budget
+                budget.save(os.path.join(self.directory, f'{budget.scene_name}_budget.json'))
+                self.report({'INFO'}, budget.summary())
+
+            inspector = RamsesInspector(exportable_scene, addon_dir=utils.get_addon_path())
             inspector.load_viewer(platform=self.platform)
 
         return {'FINISHED'}
@@ -224,6 +317,26 @@ class RamsesExportOperator(bpy.types.Operator):
         row = col.row(align=True)
         row.prop(self, 'evaluate')
         row = col.row(align=True)
+        row.prop(self, 'streaming')
+        row = col.row(align=True)
+        row.prop(self, 'parallel')
+        row = col.row(align=True)
+        row.prop(self, 'compact_transforms')
+        row = col.row(align=True)
+        row.prop(self, 'optimize_render_order')
+        row = col.row(align=True)
+        row.prop(self, 'validation_level')
+        row = col.row(align=True)
+        row.prop(self, 'report_budget')
+        row = col.row(align=True)
+        row.prop(self, 'budget_file')
+        row = col.row(align=True)
+        row.prop(self, 'record_timings')
+        row = col.row(align=True)
+        row.prop(self, 'record_trace')
+        row = col.row(align=True)
+        row.prop(self, 'profile')
+        row = col.row(align=True)
         row.prop(self, 'platform')
 
     def draw_mesh_settings(self, layout, scn):
@@ -250,12 +363,45 @@ class RamsesExportOperator(bpy.types.Operator):
         print('RamsesExportOperator unregistered')
 
 
+class RamsesEstimateOperator(bpy.types.Operator):
+    """Estimates what exporting every scene would cost, without exporting"""
+    bl_idname = "scene.ramses_estimate"
+    bl_label = "Estimate RAMSES scene costs"
+
+    evaluate: bpy.props.BoolProperty(name='Evaluate modifiers & deformations', default=True)
+
+    compact_transforms: COMPACT_TRANSFORMS
+
+    budget_file: bpy.props.StringProperty(name='Budget limits',
+                                          default='',
+                                          description='JSON file with hard limits, scenes over budget are reported',
+                                          subtype='FILE_PATH')
+
+    def execute(self, context):
+        budget_limits = BudgetLimits.load(bpy.path.abspath(self.budget_file)) if self.budget_file else None
+
+        exporter = RamsesBlenderExporter(bpy.data.scenes, compact_transforms=self.compact_transforms)
+        exporter.extract_from_blender_scene(evaluate=self.evaluate)
+
+        for budget in exporter.estimate():
+            self.report({'INFO'}, budget.summary())
+
+            if budget_limits:
+                try:
+                    budget.check(budget_limits)
+                except RuntimeError as e:
+                    self.report({'WARNING'}, str(e))
+
+        return {'FINISHED'}
+
+
 classes = (
     # Add all classes that must be registered and unregistered
     # Registration order matters
     Mesh_ListItem,
     MeshUIList,
     RamsesExportOperator,
+    RamsesEstimateOperator,
 )
 
 def register():
@@ -0,0 +1,106 @@
+#  -------------------------------------------------------------------------
+#  Copyright (C) 2019 Daniel Werner Lima Souza de Almeida
+#                     dwlsalmeida@gmail.com
+#  -------------------------------------------------------------------------
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#  -------------------------------------------------------------------------
+
+"""Times the hierarchy operations of the IR and the RAMSES build on a
+synthetic chain of nodes, each one the only child of the previous one.
+
+Usage:
+    blender -b -P benchmarks/benchmark_deep_hierarchy.py -- [-d DEPTH] [-r REPEAT]
+
+The recursive traversal the IR used to have is timed as a reference, on a
+chain short enough to stay under the recursion limit.
+"""
+
+import sys
+import time
+import argparse
+
+from ramses_export.intermediary_representation import Node, SceneGraph
+from ramses_export.exporter import RamsesBlenderExporter
+
+RECURSIVE_REFERENCE_DEPTH = 900
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-d", "--depth", type=int, default=10000, help='Length of the chain')
+    parser.add_argument("-r", "--repeat", type=int, default=5, help='Runs per operation, the best one is reported')
+    args_for_benchmark = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    return parser.parse_args(args_for_benchmark)
+
+
+def make_chain(depth: int) -> Node:
+    root = Node(name='Chain root')
+    current = root
+
+    for i in range(depth - 1):
+        child = Node(name=f'Chain node {i}')
+        current.add_child(child)
+        current = child
+
+    return root
+
+
+def recursive_traverse(node: Node):
+    """The traversal IR nodes used before switching to an explicit stack"""
+    yield node
+
+    for child in node.children:
+        yield from recursive_traverse(child)
+
+
+def best_of(repeat: int, operation) -> float:
+    best = float('inf')
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        operation()
+        best = min(best, time.perf_counter() - start)
+
+    return best
+
+
+def main():
+    args = parse_args()
+
+    chain = make_chain(args.depth)
+    last = list(chain.traverse())[-1]
+    graph = SceneGraph(scene=None, root=chain)
+    exporter = RamsesBlenderExporter([])
+
+    def build():
+        ramses_scene = exporter.ramses.createScene('Deep hierarchy benchmark')
+        exporter._ramses_build_recursively(ramses_scene, chain, exportable_scene=None)
+
+    operations = [
+        ('traverse', lambda: sum(1 for _ in chain.traverse())),
+        ('traverse_post_order', lambda: sum(1 for _ in chain.traverse_post_order())),
+        ('find (no match)', lambda: chain.find('name', 'Not in the chain', n=0)),
+        ('contains (deepest node)', lambda: chain.contains(last)),
+        ('pretty_print_graph', lambda: graph.pretty_print_graph(chain)),
+        ('teardown', chain.teardown),
+        ('_ramses_build_recursively', build),
+    ]
+
+    print(f'{"operation":<30} {"depth":>8} {"time (ms)":>10}')
+
+    for name, operation in operations:
+        elapsed = best_of(args.repeat, operation)
+        print(f'{name:<30} {args.depth:>8} {elapsed * 1000:>10.3f}')
+
+    reference_chain = make_chain(min(args.depth, RECURSIVE_REFERENCE_DEPTH))
+    reference_depth = reference_chain.node_count()
+    recursive = best_of(args.repeat, lambda: sum(1 for _ in recursive_traverse(reference_chain)))
+    iterative = best_of(args.repeat, lambda: sum(1 for _ in reference_chain.traverse()))
+
+    print(f'{"recursive traverse (before)":<30} {reference_depth:>8} {recursive * 1000:>10.3f}')
+    print(f'{"traverse":<30} {reference_depth:>8} {iterative * 1000:>10.3f}')
+
+
+main()
@@ -0,0 +1,91 @@
+#  -------------------------------------------------------------------------
+#  Copyright (C) 2019 Daniel Werner Lima Souza de Almeida
+#                     dwlsalmeida@gmail.com
+#  -------------------------------------------------------------------------
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#  -------------------------------------------------------------------------
+
+"""Measures the per-node memory overhead of the IR with __slots__ against
+the __dict__ layout nodes used to have, on the scenes in test/test_scenes.
+
+Usage:
+    blender -b -P benchmarks/benchmark_node_memory.py -- [-n PLACEHOLDERS]
+
+Only the node objects themselves are measured, i.e. the instance plus its
+__dict__ if it has one. The attribute values (matrices, vectors, Blender
+data) are shared between both layouts and are left out.
+"""
+
+import sys
+import argparse
+import pathlib
+import bpy
+
+from ramses_export.intermediary_representation import Node, SceneRepresentation
+
+TEST_SCENES_DIR = pathlib.Path(__file__).resolve().parent.parent / 'test' / 'test_scenes'
+
+
+class DictLayout():
+    """The same attribute values as a node, kept in a __dict__ as before"""
+
+    def __init__(self, node: Node):
+        for name in type(node).attribute_names().values():
+            setattr(self, name, getattr(node, name, None))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--placeholders", type=int, default=100000, help='Placeholder nodes to add on top of the scene nodes')
+    args_for_benchmark = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    return parser.parse_args(args_for_benchmark)
+
+
+def node_size(node) -> int:
+    size = sys.getsizeof(node)
+    if hasattr(node, '__dict__'):
+        size += sys.getsizeof(node.__dict__)
+    return size
+
+
+def collect_nodes(placeholders: int):
+    nodes = [Node(name=f'Placeholder {i}') for i in range(placeholders)]
+
+    for scene_file in sorted(TEST_SCENES_DIR.glob('*.blend')):
+        bpy.ops.wm.open_mainfile(filepath=str(scene_file))
+        representation = SceneRepresentation(bpy.context.scene)
+        representation.build_ir()
+        for layer in representation.layers:
+            nodes.extend(layer.traverse())
+
+    return nodes
+
+
+def main():
+    args = parse_args()
+    nodes = collect_nodes(args.placeholders)
+
+    per_type = {}
+    for node in nodes:
+        slots_size = node_size(node)
+        dict_size = node_size(DictLayout(node))
+
+        count, slots_total, dict_total = per_type.get(type(node).__name__, (0, 0, 0))
+        per_type[type(node).__name__] = (count + 1, slots_total + slots_size, dict_total + dict_size)
+
+    print(f'{"node type":<25} {"nodes":>8} {"__dict__ (B/node)":>18} {"__slots__ (B/node)":>19} {"saved":>7}')
+
+    for name, (count, slots_total, dict_total) in sorted(per_type.items()):
+        print(f'{name:<25} {count:>8} {dict_total / count:>18.1f} {slots_total / count:>19.1f} '
+              + f'{1 - slots_total / dict_total:>6.0%}')
+
+    count = sum(entry[0] for entry in per_type.values())
+    slots_total = sum(entry[1] for entry in per_type.values())
+    dict_total = sum(entry[2] for entry in per_type.values())
+    print(f'{"total":<25} {count:>8} {dict_total / count:>18.1f} {slots_total / count:>19.1f} '
+          + f'{1 - slots_total / dict_total:>6.0%}')
+
+
+main()
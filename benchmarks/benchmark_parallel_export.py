@@ -0,0 +1,97 @@
+#  -------------------------------------------------------------------------
+#  Copyright (C) 2019 Daniel Werner Lima Souza de Almeida
+#                     dwlsalmeida@gmail.com
+#  -------------------------------------------------------------------------
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#  -------------------------------------------------------------------------
+
+"""Times exporting several Blender scenes one after another against the
+parallel export, for an increasing number of worker threads.
+
+Usage:
+    blender -b -P benchmarks/benchmark_parallel_export.py -- [-s SCENES] [-o OBJECTS] [-d DIR]
+
+Every scene gets its own meshes, so no geometry is shared between them.
+Only the RAMSES build, validation and saving run in parallel, how well they
+scale depends on how much of their time the RAMSES bindings spend without
+holding the GIL.
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import bmesh
+import bpy
+
+from ramses_export.exporter import RamsesBlenderExporter
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-s", "--scenes", type=int, default=8, help='Number of scenes to export')
+    parser.add_argument("-o", "--objects", type=int, default=20, help='Mesh objects per scene')
+    parser.add_argument("-u", "--subdivisions", type=int, default=5, help='Subdivisions of every icosphere')
+    parser.add_argument("-d", "--dir", default=None, help='Where to save the scenes, a temporary directory if not set')
+    args_for_benchmark = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    return parser.parse_args(args_for_benchmark)
+
+
+def make_scenes(count: int, objects: int, subdivisions: int):
+    for scene in list(bpy.data.scenes)[1:]:
+        bpy.data.scenes.remove(scene)
+
+    scenes = [bpy.data.scenes[0]] + [bpy.data.scenes.new(f'Scene {i}') for i in range(1, count)]
+
+    for scene in scenes:
+        camera = bpy.data.objects.new(f'Camera for {scene.name}', bpy.data.cameras.new(f'Camera for {scene.name}'))
+        scene.collection.objects.link(camera)
+        scene.camera = camera
+
+        for i in range(objects):
+            mesh = bpy.data.meshes.new(f'Sphere {i} for {scene.name}')
+            sphere = bmesh.new()
+            bmesh.ops.create_icosphere(sphere, subdivisions=subdivisions, radius=1.0)
+            sphere.to_mesh(mesh)
+            sphere.free()
+
+            blender_object = bpy.data.objects.new(mesh.name, mesh)
+            blender_object.location = (i * 3.0, 0.0, 0.0)
+            scene.collection.objects.link(blender_object)
+
+    return scenes
+
+
+def export(scenes, output_dir: str, parallel: bool, max_workers: int = None) -> float:
+    start = time.perf_counter()
+
+    exporter = RamsesBlenderExporter(scenes, parallel=parallel, max_workers=max_workers)
+    exporter.extract_from_blender_scene()
+    exporter.build_from_extracted_representations(output_dir=output_dir)
+
+    return time.perf_counter() - start
+
+
+def main():
+    args = parse_args()
+    scenes = make_scenes(args.scenes, args.objects, args.subdivisions)
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        output_dir = args.dir if args.dir else temporary_dir
+
+        sequential = export(scenes, output_dir, parallel=False)
+
+        print(f'{"mode":<12} {"workers":>8} {"scenes":>7} {"time (ms)":>10} {"speedup":>8}')
+        print(f'{"sequential":<12} {1:>8} {len(scenes):>7} {sequential * 1000:>10.1f} {1.0:>8.2f}')
+
+        workers = 1
+        while workers <= min(len(scenes), os.cpu_count() or 1):
+            elapsed = export(scenes, output_dir, parallel=True, max_workers=workers)
+            print(f'{"parallel":<12} {workers:>8} {len(scenes):>7} {elapsed * 1000:>10.1f} {sequential / elapsed:>8.2f}')
+            workers *= 2
+
+
+main()
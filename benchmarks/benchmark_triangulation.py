@@ -0,0 +1,91 @@
+#  -------------------------------------------------------------------------
+#  Copyright (C) 2019 Daniel Werner Lima Souza de Almeida
+#                     dwlsalmeida@gmail.com
+#  -------------------------------------------------------------------------
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#  -------------------------------------------------------------------------
+
+"""Compares the loop triangle and BMesh triangulation paths of MeshData on
+the scenes in test/test_scenes.
+
+Usage:
+    blender -b -P benchmarks/benchmark_triangulation.py -- [-r REPEAT] [-s LEVELS]
+
+The test scenes are tiny, so '-s' adds a subdivision surface modifier to
+every mesh to get triangle counts where the difference shows.
+"""
+
+import sys
+import time
+import argparse
+import pathlib
+import bpy
+
+from ramses_export.intermediary_representation import MeshData, MeshDataCache
+
+TEST_SCENES_DIR = pathlib.Path(__file__).resolve().parent.parent / 'test' / 'test_scenes'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", "--repeat", type=int, default=5, help='Runs per scene and method, the best one is reported')
+    parser.add_argument("-s", "--subdivisions", type=int, default=0, help='Subdivision surface levels to add to every mesh')
+    args_for_benchmark = sys.argv[sys.argv.index('--') + 1:] if '--' in sys.argv else []
+    return parser.parse_args(args_for_benchmark)
+
+
+def evaluated_meshes(subdivisions: int):
+    if subdivisions:
+        for o in bpy.context.scene.objects:
+            if o.type == 'MESH':
+                modifier = o.modifiers.new('Benchmark subdivision', 'SUBSURF')
+                modifier.levels = subdivisions
+
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    return [o.evaluated_get(depsgraph) for o in bpy.context.scene.objects if o.type == 'MESH']
+
+
+def run_method(objects, triangulation: str, repeat: int):
+    """Returns the best time in seconds and the number of triangles extracted"""
+    best = float('inf')
+    triangles = 0
+
+    for _ in range(repeat):
+        cache = MeshDataCache(triangulation=triangulation)
+
+        start = time.perf_counter()
+        extracted = [cache.acquire(o) for o in objects]
+        # Acquiring is lazy, extraction only happens here
+        for mesh_data in extracted:
+            mesh_data.materialize()
+        best = min(best, time.perf_counter() - start)
+
+        triangles = sum(mesh_data.triangle_count() for mesh_data in extracted)
+        for mesh_data in extracted:
+            cache.release(mesh_data)
+
+    return best, triangles
+
+
+def main():
+    args = parse_args()
+
+    print(f'{"scene":<55} {"triangles":>10} {"loop tris (ms)":>15} {"bmesh (ms)":>12} {"speedup":>8}')
+
+    for scene_file in sorted(TEST_SCENES_DIR.glob('*.blend')):
+        bpy.ops.wm.open_mainfile(filepath=str(scene_file))
+        objects = evaluated_meshes(args.subdivisions)
+
+        loop_time, loop_triangles = run_method(objects, MeshData.LOOP_TRIANGLES, args.repeat)
+        bmesh_time, bmesh_triangles = run_method(objects, MeshData.BMESH, args.repeat)
+
+        # Both paths must produce the same amount of geometry to be comparable
+        assert loop_triangles == bmesh_triangles, f'{scene_file.name}: {loop_triangles} != {bmesh_triangles}'
+
+        print(f'{scene_file.name:<55} {loop_triangles:>10} {loop_time * 1000:>15.3f} '
+              + f'{bmesh_time * 1000:>12.3f} {bmesh_time / loop_time:>7.1f}x')
+
+
+main()
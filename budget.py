@@ -0,0 +1,340 @@
+#  -------------------------------------------------------------------------
+#  Copyright (C) 2019 Daniel Werner Lima Souza de Almeida
+#                     dwlsalmeida at gmail dot com
+#  -------------------------------------------------------------------------
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#  -------------------------------------------------------------------------
+
+"""What an exported scene costs on the target: vertices, triangles, draw
+calls, resources and so on, per mesh, per collection and per view layer."""
+
+from __future__ import annotations # Annotations name RAMSES types without evaluating them
+import json
+from . import RamsesPython
+from . import debug_utils
+from .resource_cache import ResourceCache
+from .intermediary_representation import Node, MeshNode, ViewLayerNode, LayerCollectionNode
+
+log = debug_utils.get_debug_logger()
+
+# Indices are uint32, vertex positions three float32 each
+BYTES_PER_INDEX = 4
+BYTES_PER_VERTEX = 3 * 4
+
+
+class BudgetCounts():
+    """The costs of a part of the scene. Resources shared by several of its
+    meshes are only counted once"""
+
+    __slots__ = ('name', 'view_layer', 'vertices', 'triangles', 'meshes', 'nodes', 'depth', 'render_groups', '_effects', '_resources')
+
+    def __init__(self, name: str, view_layer: str = None):
+        self.name = name
+        self.view_layer = view_layer
+        self.vertices = 0
+        self.triangles = 0
+        # Every mesh is one draw call
+        self.meshes = 0
+        self.nodes = 0
+        # Of the deepest RAMSES node, the RAMSES root being at depth 1
+        self.depth = 0
+        self.render_groups = 0
+        self._effects = set()
+        # Resource identity -> size in bytes
+        self._resources = {}
+
+    def add_mesh(self, mesh: MeshBudget):
+        self.vertices += mesh.vertices
+        self.triangles += mesh.triangles
+        self.meshes += 1
+        self._effects.add(mesh.resources[0][0])
+        self._resources.update(mesh.resources)
+
+    def add(self, other: BudgetCounts):
+        self.vertices += other.vertices
+        self.triangles += other.triangles
+        self.meshes += other.meshes
+        self.nodes += other.nodes
+        self.depth = max(self.depth, other.depth)
+        self.render_groups += other.render_groups
+        self._effects.update(other._effects)
+        self._resources.update(other._resources)
+
+    @property
+    def effects(self) -> int:
+        return len(self._effects)
+
+    @property
+    def resource_bytes(self) -> int:
+        return sum(self._resources.values())
+
+    def to_dict(self) -> dict:
+        result = {'name': self.name}
+        if self.view_layer is not None:
+            result['view_layer'] = self.view_layer
+
+        result.update({'vertices': self.vertices,
+                       'triangles': self.triangles,
+                       'draw_calls': self.meshes,
+                       'effects': self.effects,
+                       'render_groups': self.render_groups,
+                       'nodes': self.nodes,
+                       'depth': self.depth,
+                       'resource_bytes': self.resource_bytes})
+        return result
+
+
+class MeshBudget():
+    """The costs of a single mesh, shared resources included"""
+
+    __slots__ = ('name', 'view_layer', 'collection', 'vertices', 'triangles', 'nodes', 'resources')
+
+    def __init__(self, name: str, vertices: int, triangles: int, resources: list):
+        self.name = name
+        self.view_layer = None
+        self.collection = None
+        self.vertices = vertices
+        self.triangles = triangles
+        self.nodes = 0
+        # (identity, bytes) of the effect, index array and vertex array, in that order
+        self.resources = resources
+
+    def to_dict(self) -> dict:
+        effect_bytes, index_bytes, vertex_bytes = (size for _, size in self.resources)
+        return {'name': self.name,
+                'view_layer': self.view_layer,
+                'collection': self.collection,
+                'vertices': self.vertices,
+                'triangles': self.triangles,
+                'nodes': self.nodes,
+                'effect_bytes': effect_bytes,
+                'index_bytes': index_bytes,
+                'vertex_bytes': vertex_bytes}
+
+    @property
+    def resource_bytes(self) -> int:
+        return sum(size for _, size in self.resources)
+
+
+class SceneBudget():
+    """Collects the costs of a scene while it is built. Meshes and RAMSES
+    nodes are recorded as they are translated, and every view layer is
+    added once translated, while its IR is still around.
+
+    Resource sizes are estimates of what ends up in the .ramres file:
+    uncompressed buffer sizes, and the GLSL sources of effects"""
+
+    def __init__(self, scene_name: str):
+        self.scene_name = scene_name
+        self.totals = BudgetCounts(scene_name)
+        self.view_layers = []
+        self.collections = []
+        self.meshes = []
+        # IR node -> MeshBudget / number of RAMSES nodes, until its layer is added
+        self._mesh_budgets = {}
+        self._node_counts = {}
+
+    def record_mesh(self,
+                    ir_node: MeshNode,
+                    effect: RamsesPython.Effect,
+                    indices: RamsesPython.Resource,
+                    vertices: RamsesPython.Resource):
+        """Records the resources a mesh was translated with. Shared resources
+        are told apart by the identity of their RAMSES objects"""
+        self._record_mesh(ir_node, id(effect), id(indices), id(vertices))
+
+    def estimate_mesh(self, ir_node: MeshNode):
+        """Records the resources a mesh would be translated with, without
+        extracting its geometry. Effects are told apart by their sources,
+        geometry by mesh datablock, so unlike in the actual export, different
+        datablocks with identical contents are not found to be shared"""
+        ir_node.mesh_data.count()
+        effect = ResourceCache.effect_key(ir_node.vertex_shader, ir_node.fragment_shader, ir_node.vertexformat)
+        key = ir_node.mesh_data.key
+        self._record_mesh(ir_node, effect, ('indices', key), ('vertices', key))
+
+    def _record_mesh(self, ir_node: MeshNode, effect, indices, vertices):
+        mesh_data = ir_node.mesh_data
+        effect_bytes = len(ir_node.vertex_shader.encode('utf-8')) + len(ir_node.fragment_shader.encode('utf-8'))
+
+        self._mesh_budgets[ir_node] = MeshBudget(ir_node.name,
+                                                 vertices=mesh_data.vertex_count(),
+                                                 triangles=mesh_data.triangle_count(),
+                                                 resources=[(effect, effect_bytes),
+                                                            (indices, mesh_data.triangle_count() * 3 * BYTES_PER_INDEX),
+                                                            (vertices, mesh_data.vertex_count() * BYTES_PER_VERTEX)])
+
+    def record_nodes(self, ir_node: Node, count: int):
+        """Records how many RAMSES nodes an IR node was translated into"""
+        self._node_counts[ir_node] = count
+
+    def add_view_layer(self, layer: ViewLayerNode):
+        """Adds up the costs of a translated layer. Call before tearing it down"""
+        layer_counts = BudgetCounts(layer.name)
+        self.view_layers.append(layer_counts)
+        # Every scope, along with the one enclosing it
+        scopes = [(layer_counts, None)]
+        # Every layer hangs off the RAMSES root through a placeholder node
+        stack = [(child, layer_counts, 2) for child in reversed(layer.children)]
+
+        while stack:
+            node, scope, depth = stack.pop()
+
+            if isinstance(node, LayerCollectionNode):
+                collection_counts = BudgetCounts(node.name, view_layer=layer.name)
+                self.collections.append(collection_counts)
+                scopes.append((collection_counts, scope))
+                stack.extend((child, collection_counts, depth) for child in reversed(node.children))
+                continue
+
+            # Costs are added to the innermost scope and summed up later
+            nodes = self._node_counts.pop(node, 0)
+            scope.nodes += nodes
+            # Transformation nodes are chained, the object comes last
+            depth += nodes
+            scope.depth = max(scope.depth, depth)
+
+            mesh = self._mesh_budgets.pop(node, None)
+            if mesh:
+                mesh.view_layer = layer.name
+                mesh.collection = scope.name
+                mesh.nodes = nodes
+                scope.add_mesh(mesh)
+                self.meshes.append(mesh)
+
+            stack.extend((child, scope, depth) for child in reversed(node.children))
+
+        # Scopes were found enclosing ones first, so going backwards every
+        # scope is complete before it is added to the one enclosing it
+        for scope, enclosing in reversed(scopes):
+            # A RenderGroup is set up for every scope with meshes anywhere
+            # in it, and shared by all passes, see RamsesBlenderExporter.do_groups
+            if scope.meshes:
+                scope.render_groups += 1
+            if enclosing:
+                enclosing.add(scope)
+
+        self.totals.add(layer_counts)
+
+    def to_dict(self) -> dict:
+        return {'scene': self.scene_name,
+                'totals': self.totals.to_dict(),
+                'view_layers': [counts.to_dict() for counts in self.view_layers],
+                'collections': [counts.to_dict() for counts in self.collections],
+                'meshes': [mesh.to_dict() for mesh in self.meshes]}
+
+    def save(self, path: str):
+        """Writes the budget as JSON"""
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=4)
+        log.debug('Wrote the budget of scene "%s" to %s', self.scene_name, path)
+
+    def check(self, limits: BudgetLimits):
+        """Fails if the scene exceeds any of its limits
+
+        Arguments:
+            limits {BudgetLimits} -- The limits of every scene
+
+        Raises:
+            RuntimeError: Raised when a limit is exceeded. Lists every \
+                limit exceeded, along with where the costs come from
+        """
+        lines = []
+
+        for limit, maximum in limits.for_scene(self.scene_name).items():
+            count = BudgetLimits.LIMITS[limit]
+            value = getattr(self.totals, count)
+            if value <= maximum:
+                continue
+
+            lines.append(f'{count}: {value} exceeds {limit} = {maximum}')
+            lines.extend(self._breakdown(count))
+
+        if lines:
+            raise RuntimeError(f'Scene "{self.scene_name}" is over budget:\n    ' + '\n    '.join(lines))
+
+    def _breakdown(self, count: str, top: int = 3) -> list:
+        """Where the costs counted by 'count' come from. Every view layer,
+        then the largest collections and meshes"""
+        def largest(scopes):
+            return sorted((scope for scope in scopes if scope[1]), key=lambda scope: scope[1], reverse=True)[:top]
+
+        lines = [(f'ViewLayer "{counts.name}"', getattr(counts, count)) for counts in self.view_layers]
+        lines += largest((f'Collection "{counts.name}" in "{counts.view_layer}"', getattr(counts, count))
+                         for counts in self.collections)
+        if count in MeshBudget.__slots__ or count == 'resource_bytes':
+            lines += largest((f'Mesh "{mesh.name}" in "{mesh.view_layer}"', getattr(mesh, count)) for mesh in self.meshes)
+
+        return [f'    {name}: {value}' for name, value in lines]
+
+    def summary(self) -> str:
+        """A one line digest of the whole scene"""
+        totals = self.totals
+        return (f'{self.scene_name}: {totals.vertices} vertices, {totals.triangles} triangles, '
+                + f'{totals.meshes} draw calls, {totals.effects} effects, {totals.render_groups} RenderGroups, '
+                + f'{totals.nodes} nodes, ~{totals.resource_bytes / 1024:.1f} KiB of resources')
+
+
+class BudgetLimits():
+    """Hard limits for exported scenes, read from JSON such as:
+
+        {
+            "max_triangles": 100000,
+            "max_draw_calls": 200,
+            "scenes": {"Instrument cluster": {"max_resource_bytes": 4194304}}
+        }
+
+    Top level limits apply to every scene. Limits under "scenes" only
+    apply to the scene of that name, taking precedence"""
+
+    # Limit -> what it limits, an attribute of BudgetCounts
+    LIMITS = {'max_vertices': 'vertices',
+              'max_triangles': 'triangles',
+              'max_draw_calls': 'meshes',
+              'max_effects': 'effects',
+              'max_render_groups': 'render_groups',
+              'max_nodes': 'nodes',
+              'max_node_depth': 'depth',
+              'max_resource_bytes': 'resource_bytes'}
+
+    def __init__(self, limits: dict):
+        scenes = limits.get('scenes', {})
+        if not isinstance(scenes, dict):
+            raise RuntimeError('Budget limits under "scenes" must map scene names to limits.')
+        self._validate(limits, allowed=('scenes',))
+        for scene_limits in scenes.values():
+            self._validate(scene_limits)
+
+        self.default = {limit: maximum for limit, maximum in limits.items() if limit != 'scenes'}
+        self.scenes = scenes
+
+    @classmethod
+    def load(cls, path: str) -> BudgetLimits:
+        """Reads limits from a JSON file"""
+        try:
+            with open(path) as file:
+                limits = json.load(file)
+        except OSError as e:
+            raise RuntimeError(f'Cannot read budget file "{path}": {e}')
+        except json.JSONDecodeError as e:
+            raise RuntimeError(f'Invalid budget file "{path}": {e}')
+
+        log.debug('Loaded budget limits from %s', path)
+        return cls(limits)
+
+    def _validate(self, limits: dict, allowed=()):
+        for limit, maximum in limits.items():
+            if limit in allowed:
+                continue
+            if limit not in self.LIMITS:
+                raise RuntimeError(f'Unknown budget limit "{limit}", expected one of: {", ".join(self.LIMITS)}')
+            if not isinstance(maximum, int) or isinstance(maximum, bool) or maximum < 0:
+                raise RuntimeError(f'Budget limit "{limit}" must be a non-negative integer, not {maximum!r}')
+
+    def for_scene(self, scene_name: str) -> dict:
+        """The limits of a scene, limit -> maximum"""
+        limits = dict(self.default)
+        limits.update(self.scenes.get(scene_name, {}))
+        return limits
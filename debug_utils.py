@@ -34,6 +34,12 @@ def logger_unset_file(logger, fname: str):
 def get_debug_logger():
     return logging.getLogger('ramses-scene-exporter')
 
+def debug_sink_attached() -> bool:
+    """Whether debug messages end up anywhere. Use it to skip building
+    expensive diagnostics, such as whole scene dumps, nobody will read"""
+    logger = get_debug_logger()
+    return logger.isEnabledFor(logging.DEBUG) and logger.hasHandlers()
+
 def monkey_create_random(scene, n: int):
     for i in range(n):
         r = random.Random()
@@ -53,11 +59,10 @@ def print_objects(scene):
 
 
 def clear_scene(scene):
-    objects = scene_get_objects(scene)
+    # Copy the sequence, since it shrinks while objects get deleted
+    objects = list(scene_get_objects(scene))
     for o in objects:
-        o.select_set(state = True)
-        bpy.context.view_layer.objects.active = o
-        bpy.ops.object.delete()  # Delete the currently selected object
+        bpy.data.objects.remove(o, do_unlink=True)
 
 
 def print_materials():
@@ -9,23 +9,49 @@
 
 import pathlib
 import os
+from . import instrumentation
+from .resource_cache import ResourceCache
 
 
 class ExportableScene():
     """A RAMSES Scene ready to be visualized / saved"""
+
+    # Validation levels
+    VALIDATION_OFF = 'OFF' # Never validate, every scene is considered valid
+    VALIDATION_ERRORS = 'ERRORS' # Only keep the errors of the report
+    VALIDATION_FULL = 'FULL' # The whole report, including warnings
+
     def __init__(self,
                  ramses,
                  ramses_scene,
-                 blender_scene_representation):
+                 blender_scene_representation,
+                 validation_level: str = VALIDATION_FULL):
+        if validation_level not in (self.VALIDATION_OFF, self.VALIDATION_ERRORS, self.VALIDATION_FULL):
+            raise RuntimeError(f'Unknown validation level: {validation_level}')
+
         self.ramses = ramses
         self._ramses_scene = ramses_scene
         self._blender_scene_representation = blender_scene_representation
+        self.validation_level = validation_level
+        # Validating walks the whole scene, so do it once until the scene changes
+        self._validation_report = None
+        # RAMSES resources shared between the meshes of this scene
+        self.resources = ResourceCache(ramses_scene)
+        # IR node -> the RAMSES object built from it. Only filled while
+        # the IR is alive, so passes and groups need no lookups by name
+        self.ramses_objects = {}
+        # The RenderOrderOptimizer used, if any. Reports the state changes saved
+        self.render_order = None
+        # The SceneBudget collected while building, if any
+        self.budget = None
 
         # Paths are set at a later stage
         self.output_path = None
 
     @property
     def ramses_scene(self):
+        # Whoever gets hold of the scene might change it
+        self.invalidate_validation_report()
         return self._ramses_scene
 
     @property
@@ -36,21 +62,47 @@ class ExportableScene():
     def scene_representation(self):
         return self._blender_scene_representation
 
+    @instrumentation.timed(describe=lambda self: {'scene': self._blender_scene_representation.name})
     def save(self):
         """Persists the RAMSES scene."""
 
-        ramses_scene_file = os.path.join(self.output_path, f'{self.blender_scene.name}.ramses')
-        ramses_scene_resources_file = os.path.join(self.output_path, f'{self.blender_scene.name}.ramres')
-        self.ramses_scene.saveToFiles(str(ramses_scene_file),
+        # Not read from Blender, scenes may be saved from worker threads
+        scene_name = self._blender_scene_representation.name
+        ramses_scene_file = os.path.join(self.output_path, f'{scene_name}.ramses')
+        ramses_scene_resources_file = os.path.join(self.output_path, f'{scene_name}.ramres')
+        self._ramses_scene.saveToFiles(str(ramses_scene_file),
                                       str(ramses_scene_resources_file),
                                       True)
 
     def get_validation_report(self):
-        """Returns the validation report issued by RAMSES."""
-        return str(self.ramses_scene.getValidationReport())
+        """Returns the validation report issued by RAMSES, filtered according
+        to the validation level. Only computed again after the scene might
+        have been modified."""
+
+        if self.validation_level == self.VALIDATION_OFF:
+            return ''
+
+        if self._validation_report is None:
+            with instrumentation.span('ExportableScene.validate', scene=self._blender_scene_representation.name):
+                report = str(self._ramses_scene.getValidationReport())
+
+            if self.validation_level == self.VALIDATION_ERRORS:
+                # RAMSES does the whole validation anyway, but warnings
+                # no longer end up in logs or fail the export
+                report = '\n'.join(line for line in report.splitlines() if 'ERROR' in line)
+
+            self._validation_report = report
+
+        return self._validation_report
+
+    def invalidate_validation_report(self):
+        """Drops the cached validation report. Call after changing the scene
+        through anything other than the 'ramses_scene' property"""
+        self._validation_report = None
 
     def is_valid(self):
-        """Whether the underlying RAMSES scene is valid."""
+        """Whether the underlying RAMSES scene is valid. Always true if the
+        validation level is VALIDATION_OFF."""
         report = self.get_validation_report()
         # TODO: FIXME. A RenderGroup containing only nested RenderGroups triggers a warning.
         #              This is the default for Blender, however, since the default scene is
@@ -69,9 +121,10 @@ class ExportableScene():
 
         self.output_path = output_dir
 
+    @instrumentation.timed
     def to_text(self) -> str:
         """Returns the RAMSES text representation for the underlying
         RAMSES scene"""
-        text_representation = self.ramses_scene.toText()
+        text_representation = self._ramses_scene.toText()
         assert text_representation
         return text_representation
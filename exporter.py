@@ -10,39 +10,95 @@
 from __future__ import annotations # Needed in order for something to reference itself in 'typing'
 import bpy
 import math
+import logging
 import itertools
+import concurrent.futures
 from . import RamsesPython
 from . import debug_utils
+from . import instrumentation
+from . import shaders
 from . import utils
 from .exportable_scene import ExportableScene
+from .resource_cache import ResourceCache
+from .render_order import RenderOrderOptimizer
+from .budget import SceneBudget, BudgetLimits
 from .intermediary_representation import *
-from typing import List
+from typing import List, Dict, Tuple
 
 log = debug_utils.get_debug_logger()
 
+def _describe_translation(exporter, scene, ir_node, exportable_scene=None) -> dict:
+    """Tags the trace event of RamsesBlenderExporter.translate"""
+    is_mesh = isinstance(ir_node, MeshNode) and ir_node.mesh_data is not None
+    return {'object': ir_node.name, 'vertices': ir_node.mesh_data.vertex_count() if is_mesh else 0}
+
+
 class RamsesBlenderExporter():
     """Extracts the scene graph, translating it to a RAMSES scene"""
 
-    def __init__(self, scenes: List[bpy.types.Scene]):
+    def __init__(self,
+                 scenes: List[bpy.types.Scene],
+                 streaming: bool = False,
+                 compact_transforms: bool = False,
+                 validation_level: str = ExportableScene.VALIDATION_FULL,
+                 parallel: bool = False,
+                 max_workers: int = None,
+                 optimize_render_order: bool = False,
+                 collect_budget: bool = False,
+                 budget_limits: BudgetLimits = None):
+        if streaming and parallel:
+            raise RuntimeError('Streaming reads from Blender while building, it cannot be combined with a parallel export.')
+
         self.scenes = scenes
+        # Build and translate one view layer at a time instead of the whole scene
+        self.streaming = streaming
+        # Use as few transformation nodes per object as possible
+        self.compact_transforms = compact_transforms
+        # See ExportableScene.VALIDATION_*
+        self.validation_level = validation_level
+        # Build, validate and save every scene on a pool of worker threads
+        self.parallel = parallel
+        # Size of the pool, see concurrent.futures.ThreadPoolExecutor
+        self.max_workers = max_workers
+        # Sort the meshes of every RenderGroup by effect and geometry
+        self.optimize_render_order = optimize_render_order
+        # Custom shaders are read once for every scene and mesh using them
+        self.shader_library = shaders.ShaderLibrary()
+        # Count what every scene costs on the target, see budget.SceneBudget
+        self.collect_budget = collect_budget
+        # Fail the export of any scene over these, checked before saving
+        self.budget_limits = budget_limits
         self.scene_representations = []
         self.ready_to_translate = False
-        self.ramses = RamsesPython.Ramses("RAMSES Framework Handle")
+        # Created on first use, estimates do without
+        self._ramses = None
         self.exportable_scenes = []
 
+    @property
+    def ramses(self) -> RamsesPython.Ramses:
+        if self._ramses is None:
+            self._ramses = RamsesPython.Ramses("RAMSES Framework Handle")
+        return self._ramses
+
     def get_exportable_scenes(self) -> List[ExportableScene]:
         return self.exportable_scenes
 
+    @instrumentation.timed
     def extract_from_blender_scene(self, custom_params=None, evaluate=False):
         """Extract the scene graph from Blender, building an internal
         representation that can then be used to build a RAMSES scene"""
 
         for scene in self.scenes:
-            extractor = BlenderRamsesExtractor(scene)
+            extractor = BlenderRamsesExtractor(scene, shader_library=self.shader_library)
             representation = extractor.run(custom_params, evaluate)
-            representation.build_ir()
             self.scene_representations.append(representation)
 
+            if self.streaming:
+                # The IR is built layer by layer while translating
+                continue
+
+            representation.build_ir()
+
             """ While this is not a 1:1 translation, if we've created way more
             nodes than there were objects then this might be indicative of a
             bug somewhere. Start checking after a minimum number of nodes"""
@@ -50,103 +106,212 @@ class RamsesBlenderExporter():
                 (representation.graph.node_count() <= \
                 len(representation.scene.objects) * 1.25), "Too many objects were created"
 
+            if self.parallel:
+                # Workers must not touch Blender, its data is not thread-safe
+                representation.detach()
+
+        self.shader_library.log_statistics()
         self.ready_to_translate = True
 
-    def build_from_extracted_representations(self):
-        for representation in self.scene_representations:
-            ramses_scene = self.build_ramses_scene(representation)
-            self.exportable_scenes.append(ramses_scene)
+    @instrumentation.timed
+    def build_from_extracted_representations(self, output_dir: str = None):
+        """Builds a RAMSES scene for every extracted representation
+
+        Keyword Arguments:
+            output_dir {str} -- If set, every scene is also validated and saved \
+                to this directory as soon as it is built (default: {None})
+
+        Raises:
+            RuntimeError: Raised when a scene to be saved is not valid, or \
+                when a scene is over budget
+        """
+
+        if not self.parallel:
+            for representation in self.scene_representations:
+                exportable_scene = self._build_and_save(representation, output_dir)
+                self.exportable_scenes.append(exportable_scene)
+            return
+
+        log.debug('Building %d scenes in parallel', len(self.scene_representations))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            # Scenes keep their order, whichever one finishes first.
+            # RAMSES clients are not meant to be shared between threads,
+            # so every scene gets a framework of its own
+            # Workers report their timings under this very call
+            build_and_save = instrumentation.in_current_span(self._build_and_save)
+            futures = [pool.submit(build_and_save,
+                                   representation,
+                                   output_dir,
+                                   RamsesPython.Ramses(f'RAMSES Framework Handle for {representation.name}'))
+                       for representation in self.scene_representations]
+
+            self.exportable_scenes.extend(future.result() for future in futures)
+
+    @instrumentation.timed
+    def estimate(self) -> List[SceneBudget]:
+        """Estimates what every extracted scene costs once exported, creating
+        no RAMSES objects and only counting the vertices and triangles of
+        meshes. Takes the place of 'build_from_extracted_representations',
+        tearing down the IR just the same. Exporting in parallel extracts
+        every mesh up front, so estimate without
+
+        Raises:
+            RuntimeError: Raised when 'extract_from_blender_scene' is \
+                not called first.
+
+        Returns:
+            List[SceneBudget] -- The estimated budget of every scene, in order
+        """
+
+        if not self.ready_to_translate:
+            raise RuntimeError("Extract data from Blender first.")
+
+        budgets = []
+
+        for scene_representation in self.scene_representations:
+            budget = SceneBudget(scene_representation.name)
+            layers = scene_representation.iter_view_layers() if self.streaming else scene_representation.layers
+
+            for layer in layers:
+                for ir_node in layer.traverse():
+                    if isinstance(ir_node, (ViewLayerNode, LayerCollectionNode)):
+                        continue
+
+                    # The transformation nodes, then the object itself, see 'translate'
+                    budget.record_nodes(ir_node, self._count_transforms_for_node(ir_node) + 1)
+                    if isinstance(ir_node, MeshNode):
+                        budget.estimate_mesh(ir_node)
+
+                budget.add_view_layer(layer)
+                if self.streaming:
+                    layer.teardown()
+
+            scene_representation.teardown()
+            log.debug('Estimated cost of scene %s', budget.summary())
+            budgets.append(budget)
+
+        return budgets
 
-    def do_passes(self, scene_representation: SceneRepresentation, ramses_scene: RamsesPython.Scene):
-        for layer in scene_representation.layers:
-            assert isinstance(layer, ViewLayerNode)
-            log.debug(f'Setting up a RenderPass for {layer.name}')
+    def _build_and_save(self,
+                        scene_representation: SceneRepresentation,
+                        output_dir: str = None,
+                        ramses: RamsesPython.Ramses = None) -> ExportableScene:
+        exportable_scene = self.build_ramses_scene(scene_representation, ramses=ramses)
 
-            render_pass = ramses_scene.createRenderPass(f'RenderPass for {layer.name}')
+        if output_dir:
+            if not exportable_scene.is_valid():
+                raise RuntimeError(exportable_scene.get_validation_report())
 
-            scene_camera_blender_object = scene_representation.camera
+            exportable_scene.set_output_dir(output_dir)
+            exportable_scene.save()
+        elif self.parallel:
+            # Validation walks the whole scene, so better done on the pool.
+            # The report is cached for whoever asks for it later
+            exportable_scene.get_validation_report()
 
-            if scene_representation.evaluate:
-                scene_camera_blender_object = scene_camera_blender_object.evaluated_get(layer.depsgraph)
+        return exportable_scene
+
+    @instrumentation.timed
+    def do_passes(self,
+                  ramses_scene: RamsesPython.Scene,
+                  cameras: List[Tuple[str, RamsesPython.Camera]],
+                  groups: List[RamsesPython.RenderGroup]):
+        """Sets up a RenderPass for every view layer, looking through the
+        scene camera of that layer. Every pass renders the RenderGroups of
+        all layers, each group being shared by all passes
+
+        Arguments:
+            ramses_scene {RamsesPython.Scene} -- The scene to create the passes in
+            cameras {List[Tuple[str, RamsesPython.Camera]]} -- The name of every \
+                layer, along with its translated scene camera
+            groups {List[RamsesPython.RenderGroup]} -- The RenderGroup of every \
+                layer with meshes, in the order to render them
+        """
 
-            assert len(layer.find_from_blender_object(scene_camera_blender_object)) == 1, 'Did you exclude the scene camera from the view layer?'
-            scene_camera_ir = layer.find_from_blender_object(scene_camera_blender_object)[0]
+        for layer_name, camera in cameras:
+            log.debug('Setting up a RenderPass for %s', layer_name)
 
-            camera = RamsesPython.toCamera(ramses_scene.findObjectByName(scene_camera_ir.name))
+            render_pass = ramses_scene.createRenderPass(f'RenderPass for {layer_name}')
             render_pass.setCamera(camera)
 
-            self.do_groups(scene_representation, ramses_scene, render_pass)
+            for order, group in enumerate(groups):
+                render_pass.addRenderGroup(group, order)
 
+    @instrumentation.timed
     def do_groups(self,
-                  scene_representation: SceneRepresentation,
                   ramses_scene: RamsesPython.Scene,
-                  ramses_pass: RamsesPython.RenderPass):
-
-        def extract_nested_meshes(mesh):
+                  ramses_objects: Dict[Node, RamsesPython.Node],
+                  layer: ViewLayerNode,
+                  render_order: RenderOrderOptimizer = None) -> RamsesPython.RenderGroup:
+        """Sets up a RenderGroup for a view layer, nesting one for each of
+        its collections
 
-            ret = []
+        Arguments:
+            ramses_scene {RamsesPython.Scene} -- The scene to create the groups in
+            ramses_objects {Dict[Node, RamsesPython.Node]} -- The RAMSES object \
+                built for each IR node, see ExportableScene.ramses_objects
+            layer {ViewLayerNode} -- The layer, already translated into 'ramses_scene'
 
-            for child in mesh.children:
-                if isinstance(child, MeshNode):
-                    ret.append(child)
+        Keyword Arguments:
+            render_order {RenderOrderOptimizer} -- Sorts the meshes of every \
+                RenderGroup, if set (default: {None})
 
-                ret.extend(extract_nested_meshes(child))
+        Returns:
+            RamsesPython.RenderGroup -- The group of the layer, None if there \
+                are no meshes in it
+        """
 
-            return ret
+        def extract_nested_meshes(mesh):
+            return [node for node in mesh.traverse() if node is not mesh and isinstance(node, MeshNode)]
 
-        def do_group(scene_representation, ramses_scene, ramses_pass, current_node):
+        def do_group(current_node):
             assert isinstance(current_node, ViewLayerNode) or isinstance(current_node, LayerCollectionNode)
-            log.debug(f'Setting up a RenderGroup for {current_node.name}')
+            log.debug('Setting up a RenderGroup for %s', current_node.name)
 
             current_group = ramses_scene.createRenderGroup(f'RenderGroup for {current_node.name}')
-            render_order = 0
-            empty = True
+            # (IR node, RAMSES mesh) for meshes, (None, RAMSES group) for nested groups
+            slots = []
 
             for child in current_node.children:
 
                 if isinstance(child, MeshNode):
-
-                    ramses_mesh = RamsesPython.toMesh(ramses_scene.findObjectByName(child.name))
-                    assert ramses_mesh
-
-                    current_group.addMesh(ramses_mesh, render_order)
-                    render_order += 1
-
-                    for nested_mesh in extract_nested_meshes(child):
-                        # Fix for when a mesh has child meshes.
-                        # It would break otherwise.
-                        # Only the topmost mesh would get added to the group,
-                        # any child mesh would be left behind.
-
-                        ramses_mesh = RamsesPython.toMesh(ramses_scene.findObjectByName(nested_mesh.name))
-                        current_group.addMesh(ramses_mesh, render_order)
-                        render_order += 1
-
-                    empty = False
+                    # Fix for when a mesh has child meshes.
+                    # It would break otherwise.
+                    # Only the topmost mesh would get added to the group,
+                    # any child mesh would be left behind.
+                    for mesh in [child] + extract_nested_meshes(child):
+                        ramses_mesh = RamsesPython.toMesh(ramses_objects[mesh])
+                        assert ramses_mesh
+                        slots.append((mesh, ramses_mesh))
 
                 elif isinstance(child, LayerCollectionNode):
-                    child_group = do_group(scene_representation, ramses_scene, ramses_pass, current_node=child)
+                    child_group = do_group(current_node=child)
                     if child_group:
-                        empty = False
-                        current_group.addRenderGroup(child_group, render_order)
-                        render_order += 1
+                        slots.append((None, child_group))
+
+            if render_order:
+                slots = render_order.order(slots, keep_order=current_node.keep_render_order)
 
-            if empty:
+            for order, (ir_node, ramses_object) in enumerate(slots):
+                if ir_node is None:
+                    current_group.addRenderGroup(ramses_object, order)
+                else:
+                    current_group.addMesh(ramses_object, order)
+
+            if not slots:
                 ramses_scene.destroy(current_group)
                 current_group = None
 
             return current_group
 
-        for layer in scene_representation.layers:
-            order_within_pass = 0
-            group = do_group(scene_representation, ramses_scene, ramses_pass, current_node=layer)
-            if group:
-                # Do not fail if we do not find meshes (i.e. blank scene, empty collection, etc)
-                ramses_pass.addRenderGroup(group, order_within_pass)
-                order_within_pass += 1
+        assert isinstance(layer, ViewLayerNode)
+        return do_group(current_node=layer)
 
+    @instrumentation.timed
     def build_ramses_scene(self,
-                           scene_representation: SceneRepresentation) -> ExportableScene:
+                           scene_representation: SceneRepresentation,
+                           ramses: RamsesPython.Ramses = None) -> ExportableScene:
         """Builds a RAMSES scene out of the available scene \
             representations
 
@@ -154,9 +319,13 @@ class RamsesBlenderExporter():
             scene_representation {SceneRepresentation} -- The scene \
                 representation previously extracted from Blender.
 
+        Keyword Arguments:
+            ramses {RamsesPython.Ramses} -- The framework to create the scene \
+                with, the one of the exporter if not set (default: {None})
+
         Raises:
             RuntimeError: Raised when 'extract_from_blender_scene' is \
-                not called first.
+                not called first, or when the scene exceeds 'budget_limits'.
 
         Returns:
             ExportableScene -- A scene that is ready to be visualized / saved.
@@ -166,20 +335,40 @@ class RamsesBlenderExporter():
             raise RuntimeError("Extract data from Blender first.")
 
 
-        ramses_scene = self.ramses.createScene("test scene")
+        if ramses is None:
+            ramses = self.ramses
+
+        ramses_scene = ramses.createScene("test scene")
 
         ir_root = scene_representation.graph.root
 
-        exportable_scene = ExportableScene(self.ramses,
+        exportable_scene = ExportableScene(ramses,
                                            ramses_scene,
-                                           scene_representation)
+                                           scene_representation,
+                                           validation_level=self.validation_level)
+
+        if self.optimize_render_order:
+            exportable_scene.render_order = RenderOrderOptimizer()
 
-        log.debug(\
-            f'Intermediary representation consists of:\n{str(scene_representation.graph)}')
+        if self.collect_budget or self.budget_limits:
+            exportable_scene.budget = SceneBudget(scene_representation.name)
 
         ramses_root = ramses_scene.createNode('RAMSES Root')
 
-        for layer in scene_representation.layers:
+        if self.streaming:
+            # Layers are built on demand and torn down as soon as they are
+            # translated, so the full IR never coexists with the RAMSES scene
+            layers = scene_representation.iter_view_layers()
+        else:
+            if debug_utils.debug_sink_attached():
+                log.debug('Intermediary representation consists of:\n%s', scene_representation.graph)
+            layers = scene_representation.layers
+
+        # The scene camera of every layer, and the RenderGroups every pass renders
+        cameras = []
+        groups = []
+
+        for layer in layers:
             placeholder = ramses_scene.createNode(f'Placeholder node for ViewLayer "{layer.name}"')
             self._ramses_build_recursively(ramses_scene,
                                            layer,
@@ -187,19 +376,58 @@ class RamsesBlenderExporter():
                                            exportable_scene=exportable_scene)
             ramses_root.addChild(placeholder)
 
-        self.do_passes(scene_representation, ramses_scene)
+            # Grouped right away, while the IR of the layer is around, so
+            # streaming and regular exports build the very same scene
+            scene_camera_ir = scene_representation.camera_node(layer)
+            cameras.append((layer.name, RamsesPython.toCamera(exportable_scene.ramses_objects[scene_camera_ir])))
+
+            group = self.do_groups(ramses_scene,
+                                   exportable_scene.ramses_objects,
+                                   layer,
+                                   render_order=exportable_scene.render_order)
+            if group:
+                # Do not fail if we do not find meshes (i.e. blank scene, empty collection, etc)
+                groups.append(group)
+
+            if exportable_scene.budget:
+                exportable_scene.budget.add_view_layer(layer)
+
+            if self.streaming:
+                log.debug('Streamed ViewLayer "%s" into the RAMSES scene. Tearing down its IR', layer.name)
+                # Do not keep torn down nodes alive through the map
+                exportable_scene.ramses_objects.clear()
+                if exportable_scene.render_order:
+                    exportable_scene.render_order.clear()
+                layer.teardown()
 
-        log.debug(f'Successfully built RAMSES Scenegraph: {str(ramses_root)}. Tearing down the IR graph')
+        # Every pass renders the groups of every layer, so passes come last
+        self.do_passes(ramses_scene, cameras, groups)
+
+        log.debug('Successfully built RAMSES Scenegraph: %s. Tearing down the IR graph', ramses_root)
+        exportable_scene.ramses_objects.clear()
         scene_representation.teardown()
 
+        if self.budget_limits:
+            # Before anything walks or saves the RAMSES scene
+            exportable_scene.budget.check(self.budget_limits)
+
+        exportable_scene.resources.log_statistics()
 
-        validation_report = exportable_scene.get_validation_report()
-        log.debug(f"Validation report for scene {str(exportable_scene.ramses_scene)}:\n{validation_report}")
+        if exportable_scene.render_order:
+            exportable_scene.render_order.clear()
+            exportable_scene.render_order.log_statistics()
+
+        # Both walk the whole RAMSES scene, toText() can take longer than the export itself
+        if debug_utils.debug_sink_attached():
+            log.debug('Validation report for scene %s:\n%s',
+                      ramses_scene,
+                      exportable_scene.get_validation_report())
+            log.debug('RAMSES Scene Text Representation:\n%s\n', exportable_scene.to_text())
 
-        log.debug(f"RAMSES Scene Text Representation:\n{exportable_scene.to_text()}\n")
         return exportable_scene
 
 
+    @instrumentation.timed
     def _ramses_build_recursively(self,
                                   scene: RamsesPython.Scene,
                                   ir_node: Node,
@@ -208,7 +436,9 @@ class RamsesBlenderExporter():
                                   current_depth = 0) -> RamsesPython.Node:
 
         """Builds a RAMSES scene graph starting from 'node' and
-        optionally adds it as a child to 'parent'
+        optionally adds it as a child to 'parent'. Despite the name, walks
+        the hierarchy with an explicit stack so arbitrarily deep hierarchies
+        can be built
 
         Arguments:
             scene {RamsesPython.Scene} -- The scene to build nodes from
@@ -224,41 +454,57 @@ class RamsesBlenderExporter():
             RamsesPython.Node -- The built node / scene graph
         """
 
-        skip = isinstance(ir_node, ViewLayerNode) or isinstance(ir_node, LayerCollectionNode)
+        def skip(node):
+            return isinstance(node, ViewLayerNode) or isinstance(node, LayerCollectionNode)
 
-        if skip:
-            for child in ir_node.children:
-                self._ramses_build_recursively(scene,
-                                               child,
-                                               exportable_scene,
-                                               parent=parent,
-                                               current_depth=current_depth)
-            return parent
-        else:
-            log.debug((' ' * current_depth * 4) +
-                      f'Recursively building RAMSES nodes for IR node: "{str(ir_node)}", '
-                     +f'RAMSES parent is "{parent.getName() if parent else None}"')
+        # Entries are either nodes still to be built or translated nodes
+        # waiting to be added to their RAMSES parent. The latter are pushed
+        # below the children, so, just like with recursion, a node is only
+        # added to its parent once its whole subtree has been built
+        BUILD, ADD_TO_PARENT = 0, 1
+        stack = [(BUILD, ir_node, parent, current_depth)]
+        ret = parent if skip(ir_node) else None
 
-            translation_result = self.translate(scene, ir_node, exportable_scene=exportable_scene)
+        while stack:
+            action, node, ramses_parent, depth = stack.pop()
+
+            if action == ADD_TO_PARENT:
+                ramses_parent.addChild(node)
+                continue
+
+            if skip(node):
+                stack.extend((BUILD, child, ramses_parent, depth) for child in reversed(node.children))
+                continue
+
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug('%sRecursively building RAMSES nodes for IR node: "%s", RAMSES parent is "%s"',
+                          ' ' * depth * 4,
+                          node,
+                          ramses_parent.getName() if ramses_parent else None)
+
+            translation_result = self.translate(scene, node, exportable_scene=exportable_scene)
             first_translated_node = translation_result[0]
             last_translated_node = translation_result[-1]
 
-            if ir_node.children:
-                current_depth += 1
+            if ret is None:
+                ret = first_translated_node
 
-            for child in ir_node.children:
-                self._ramses_build_recursively(scene,
-                                            child,
-                                            exportable_scene,
-                                            parent=last_translated_node,
-                                            current_depth=current_depth)
+            if exportable_scene:
+                # The object itself comes after its transformation nodes
+                exportable_scene.ramses_objects[node] = translation_result[-1]
+                if exportable_scene.budget:
+                    exportable_scene.budget.record_nodes(node, len(translation_result))
 
-            if parent:
-                parent.addChild(first_translated_node)
+            if ramses_parent:
+                stack.append((ADD_TO_PARENT, first_translated_node, ramses_parent, depth))
 
-            return first_translated_node
+            child_depth = depth + 1 if node.children else depth
+            stack.extend((BUILD, child, last_translated_node, child_depth) for child in reversed(node.children))
+
+        return ret
 
 
+    @instrumentation.timed(describe=_describe_translation)
     def translate(self, scene: RamsesPython.Scene, ir_node: Node, exportable_scene: ExportableScene = None) -> RamsesPython.Node:
         """Translates the IRNode into a RAMSES node / graph
 
@@ -276,7 +522,10 @@ class RamsesBlenderExporter():
         ret = []
 
         # Translate the transforms i.e. scaling, rotation and translation to RAMSES.
-        transformation_nodes = self._resolve_transforms_for_node(scene, ir_node)
+        if self.compact_transforms:
+            transformation_nodes = self._resolve_compact_transforms_for_node(scene, ir_node)
+        else:
+            transformation_nodes = self._resolve_transforms_for_node(scene, ir_node)
         ret.extend(transformation_nodes)
 
         last_transformation = transformation_nodes[-1] if transformation_nodes else None
@@ -286,8 +535,10 @@ class RamsesBlenderExporter():
         if isinstance(ir_node, MeshNode):
             ramses_mesh_node = scene.createMesh(name)
 
-            indices = scene.createIndexArray(ir_node.get_indices())
-            vertices = scene.createVertexArray(3, ir_node.get_vertex_buffer())
+            resources = exportable_scene.resources if exportable_scene else ResourceCache(scene)
+            indices, vertices = resources.geometry_arrays(ir_node)
+            # RAMSES holds its own copy now, drop ours before moving on
+            ir_node.release_geometry()
             # TODO normals, texcoords...
             # NOTE: normals, texcoords and other data are easily
             #       found in intermediary_representation.MeshNode
@@ -300,7 +551,13 @@ class RamsesBlenderExporter():
             vertex_shader = ir_node.vertex_shader
             fragment_shader = ir_node.fragment_shader
 
-            ramses_effect = scene.createEffect(vertex_shader, fragment_shader)
+            # Most meshes share the default or library shaders
+            ramses_effect = resources.effect(vertex_shader, fragment_shader, ir_node.vertexformat)
+
+            if exportable_scene and exportable_scene.render_order:
+                exportable_scene.render_order.record(ir_node, ramses_effect, indices, vertices)
+            if exportable_scene and exportable_scene.budget:
+                exportable_scene.budget.record_mesh(ir_node, ramses_effect, indices, vertices)
             geometry = scene.createGeometry(ramses_effect)
             appearance = scene.createAppearance(ramses_effect)
 
@@ -339,7 +596,8 @@ class RamsesBlenderExporter():
         if last_transformation:
             last_transformation.addChild(ramses_node)
 
-        log.debug(f'Translated IRNode "{str(ir_node)}" into "{ramses_node.getName()}"')
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('Translated IRNode "%s" into "%s"', ir_node, ramses_node.getName())
 
         return ret
 
@@ -461,14 +719,127 @@ class RamsesBlenderExporter():
 
         return ret
 
+    def _count_transforms_for_node(self, ir_node: Node) -> int:
+        """How many transformation nodes translating 'ir_node' creates, see
+        '_resolve_transforms_for_node' and '_resolve_compact_transforms_for_node'"""
+
+        if ir_node.is_root():
+            return 0
+
+        if not self.compact_transforms:
+            # Translation, a rotation per axis and scaling
+            return 5
+
+        rotated_axes = sum(1 for angle in ir_node.rotation if angle != 0)
+        translated = any(component != 0 for component in ir_node.location)
+        scaled = any(component != 1 for component in ir_node.scale)
+
+        if not (translated or scaled or rotated_axes):
+            return 0
+
+        return max(rotated_axes, 1)
+
+    def _resolve_compact_transforms_for_node(self,
+                                             ramses_scene: RamsesPython.Scene,
+                                             ir_node: RamsesPython.Node) -> List[RamsesPython.Node]:
+        """
+        Resolves the same transforms as '_resolve_transforms_for_node' with
+        as few RAMSES nodes as possible.
+
+        A RAMSES node applies its own scaling, rotation and translation in
+        that order, so translation and scaling can share a node with the
+        outermost and innermost rotation, respectively. Rotations about
+        zero degrees are dropped. That leaves a single node unless the
+        object is rotated about more than one axis, in which case there is
+        one node per rotated axis to keep Blender's rotation order.
+        Identity transforms produce no node at all.
+
+        Arguments:
+            ramses_scene {RamsesPython.Scene} -- The scene to create
+            nodes from.
+            ir_node {RamsesPython.Node} -- The node to resolve
+            transforms from.
+
+        Returns:
+            List[RamsesPython.Node] -- A list with the RAMSES nodes in the
+            order they were added, possibly empty.
+        """
+
+        if ir_node.is_root():
+            # Do not append any transforms to the root node itself.
+            return []
+
+        assert isinstance(ir_node.scale, mathutils.Vector)
+
+        location = ir_node.location
+        scale = ir_node.scale
+        rotation = ir_node.rotation
+        rotation_order = ir_node.rotation.order
+
+        assert len(rotation) == 3 # A value for each axis
+        assert len(rotation_order) == 3 # Three axis of rotation
+
+        # Outermost rotation first, e.g. XYZ is (Z -> Y -> X -> Node)
+        rotations = [(rotation_order[i], -rotation[i] * 180 / math.pi)
+                     for i in reversed(range(3)) if rotation[i] != 0]
+
+        translated = any(component != 0 for component in location)
+        scaled = any(component != 1 for component in scale)
+
+        if not (translated or scaled or rotations):
+            return []
+
+        # One node per rotated axis, or a single one if there are no rotations
+        node_count = max(len(rotations), 1)
+        ret = []
+
+        for index in range(node_count):
+            translate = translated and index == 0
+            scale_here = scaled and index == node_count - 1
+            axis, rotation_degrees = rotations[index] if rotations else (None, 0)
+
+            description = []
+            if translate:
+                description.append(f'translation {str(location)}')
+            if axis:
+                description.append(f'rotation in axis ({axis}) by {rotation_degrees}')
+            if scale_here:
+                description.append(f'scaling {str(scale)}')
+
+            node = ramses_scene.createNode(f'Transforms "{str(ir_node)}": ' + ', '.join(description))
+
+            if translate:
+                node.setTranslation(location[0], location[1], location[2])
+
+            if axis:
+                # For some reason, blender uses left-hand instead of right-hand rule for Euler rotations
+                # Thus, rotation values are negative (see _resolve_rotation_order)
+                node.setRotation(rotation_degrees if axis == 'X' else 0,
+                                 rotation_degrees if axis == 'Y' else 0,
+                                 rotation_degrees if axis == 'Z' else 0)
+
+            if scale_here:
+                node.setScaling(scale[0], scale[1], scale[2])
+
+            ret.append(node)
+
+        for parent, child in zip(ret, ret[1:]):
+            parent.addChild(child)
+
+        return ret
+
 
 class BlenderRamsesExtractor():
     """Runs over a scene extracting relevant data from bpy"""
 
-    def __init__(self, scene: bpy.types.Scene):
+    def __init__(self, scene: bpy.types.Scene, shader_library: shaders.ShaderLibrary = None):
         self.scene = scene
+        self.shader_library = shader_library
 
     def run(self, custom_params=None, evaluate=False):
-        log.debug(f'Extracting data from scene {self.scene}')
-        representation = SceneRepresentation(self.scene, custom_params, evaluate=evaluate)
+        log.debug('Extracting data from scene %s', self.scene)
+        representation = SceneRepresentation(self.scene,
+                                             custom_params,
+                                             evaluate=evaluate,
+                                             shader_library=self.shader_library)
         return representation
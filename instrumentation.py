@@ -0,0 +1,401 @@
+#  -------------------------------------------------------------------------
+#  Copyright (C) 2019 Daniel Werner Lima Souza de Almeida
+#                     dwlsalmeida at gmail dot com
+#  -------------------------------------------------------------------------
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#  -------------------------------------------------------------------------
+
+"""Hierarchical timing of the export phases.
+
+Functions are marked with the 'timed' decorator, code blocks with the
+'span' context manager. Both cost a single check while no TimingRecorder
+is active, so they can stay in hot paths such as the translation of every
+node.
+
+Recorders can also keep every single span as an event of the Chrome trace
+format, to be viewed as a timeline in chrome://tracing or Perfetto.
+
+For anything finer grained, ExportProfiler runs cProfile and tracemalloc
+over the export.
+"""
+
+import os
+import io
+import json
+import time
+import pstats
+import cProfile
+import tracemalloc
+import functools
+import threading
+import contextlib
+from . import debug_utils
+
+log = debug_utils.get_debug_logger()
+
+# The recorder spans are reported to, if any. Shared by every thread, so
+# the workers of a parallel export report to the same recorder
+_active_recorder = None
+# The profiler worker threads add their profiles to, if any
+_active_profiler = None
+
+
+class SpanRecord():
+    """Every execution of a span with the same name and the same parent,
+    merged into one. Keeps reports small even for per-node spans"""
+
+    __slots__ = ('name', 'count', 'total_seconds', 'children')
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total_seconds = 0.0
+        # Name -> SpanRecord, in the order the spans were first entered
+        self.children = {}
+
+    def self_seconds(self) -> float:
+        """Time spent in this span but in none of its children"""
+        return self.total_seconds - sum(child.total_seconds for child in self.children.values())
+
+    def to_dict(self) -> dict:
+        return {'name': self.name,
+                'count': self.count,
+                'total_seconds': self.total_seconds,
+                'self_seconds': self.self_seconds(),
+                'children': [child.to_dict() for child in self.children.values()]}
+
+
+class TimingRecorder():
+    """Collects spans into a tree. Each thread keeps its own stack of open
+    spans, so spans opened on worker threads are nested under whatever span
+    was current when the work was handed over, see 'in_current_span'"""
+
+    def __init__(self, trace: bool = False):
+        self.root = SpanRecord('export')
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._wall_seconds = 0.0
+        # Every span as a Chrome trace event, if tracing
+        self.trace = trace
+        self.trace_events = []
+        # Trace timestamps are relative to the creation of the recorder
+        self._epoch = time.perf_counter()
+        self._traced_threads = set()
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Makes this the recorder spans are reported to"""
+        global _active_recorder
+        previous = _active_recorder
+        _active_recorder = self
+        start = time.perf_counter()
+
+        try:
+            yield self
+        finally:
+            self._wall_seconds += time.perf_counter() - start
+            _active_recorder = previous
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = [self.root]
+            self._local.stack = stack
+        return stack
+
+    def current(self) -> SpanRecord:
+        return self._stack()[-1]
+
+    @contextlib.contextmanager
+    def resume(self, record: SpanRecord):
+        """Nests the spans of the calling thread under 'record'"""
+        stack = self._stack()
+        stack.append(record)
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    @contextlib.contextmanager
+    def span(self, name: str, **args):
+        stack = self._stack()
+        parent = stack[-1]
+
+        with self._lock:
+            record = parent.children.get(name)
+            if record is None:
+                record = SpanRecord(name)
+                parent.children[name] = record
+
+        stack.append(record)
+        start = time.perf_counter()
+
+        try:
+            # Callers may add to the arguments of the trace event
+            yield args
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                record.count += 1
+                record.total_seconds += elapsed
+
+                if self.trace:
+                    self._add_trace_event(name, start, elapsed, args)
+
+    def _add_trace_event(self, name: str, start: float, elapsed: float, args: dict):
+        """Adds a complete event. Call with the lock held"""
+        thread = threading.current_thread()
+
+        if thread.ident not in self._traced_threads:
+            # Names the row of the thread in the timeline
+            self._traced_threads.add(thread.ident)
+            self.trace_events.append({'name': 'thread_name',
+                                      'ph': 'M',
+                                      'pid': os.getpid(),
+                                      'tid': thread.ident,
+                                      'args': {'name': thread.name}})
+
+        self.trace_events.append({'name': name,
+                                  'cat': 'export',
+                                  'ph': 'X',
+                                  # Microseconds
+                                  'ts': (start - self._epoch) * 1e6,
+                                  'dur': elapsed * 1e6,
+                                  'pid': os.getpid(),
+                                  'tid': thread.ident,
+                                  'args': {key: value if isinstance(value, (int, float, bool)) else str(value)
+                                           for key, value in args.items()}})
+
+    def to_dict(self) -> dict:
+        """The report. Spans run in parallel add up, so the children of a
+        span may take longer than the wall-clock time of the whole export"""
+        return {'version': 1,
+                'wall_seconds': self._wall_seconds,
+                'spans': [child.to_dict() for child in self.root.children.values()]}
+
+    def save(self, path: str):
+        """Writes the report as JSON"""
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file, indent=4)
+        log.debug('Wrote export timings to %s', path)
+
+    def save_trace(self, path: str):
+        """Writes the spans in the Chrome trace format. Needs 'trace' to be set"""
+        if not self.trace:
+            raise RuntimeError('The recorder was not set up to trace.')
+
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': self.trace_events, 'displayTimeUnit': 'ms'}, file)
+        log.debug('Wrote %d trace events to %s', len(self.trace_events), path)
+
+    def summary(self, max_depth: int = 2) -> str:
+        """A human-readable digest of the top of the span tree
+
+        Keyword Arguments:
+            max_depth {int} -- How many levels of spans to include (default: {2})
+
+        Returns:
+            str -- One line per span, indented by depth
+        """
+        lines = [f'Export took {self._wall_seconds:.3f} s']
+        stack = [(child, 1) for child in reversed(list(self.root.children.values()))]
+
+        while stack:
+            record, depth = stack.pop()
+            count = f' ({record.count}x)' if record.count > 1 else ''
+            lines.append(f'{"  " * depth}{record.name}: {record.total_seconds:.3f} s{count}')
+
+            if depth < max_depth:
+                stack.extend((child, depth + 1) for child in reversed(list(record.children.values())))
+
+        return '\n'.join(lines)
+
+
+def span(name: str, **args):
+    """Times a block of code, if a recorder is active
+
+    Arguments:
+        name {str} -- Spans with the same name under the same parent are merged
+
+    Keyword Arguments:
+        Tags for the trace event, e.g. the name of the object being worked on
+
+    Returns:
+        A context manager. Entering it gives a dictionary the block can add \
+        more tags to, which is thrown away if nothing is recorded
+    """
+    recorder = _active_recorder
+    if recorder is None:
+        return contextlib.nullcontext(args)
+    return recorder.span(name, **args)
+
+
+def timed(function=None, describe=None):
+    """Decorator timing every call of a function under its qualified name.
+    Use as '@timed', or as '@timed(describe=...)' to tag the trace events
+
+    Keyword Arguments:
+        describe {callable} -- Called with the arguments of the function once \
+            it returns, only while tracing. Returns the tags of the trace event \
+            as a dictionary (default: {None})
+    """
+    if function is None:
+        return functools.partial(timed, describe=describe)
+
+    name = function.__qualname__
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        recorder = _active_recorder
+        if recorder is None:
+            return function(*args, **kwargs)
+
+        with recorder.span(name) as tags:
+            result = function(*args, **kwargs)
+            if describe and recorder.trace:
+                tags.update(describe(*args, **kwargs))
+            return result
+
+    return wrapper
+
+
+@contextlib.contextmanager
+def activate(*recorders):
+    """Activates every TimingRecorder and ExportProfiler given, skipping None"""
+    with contextlib.ExitStack() as stack:
+        for recorder in recorders:
+            if recorder is not None:
+                stack.enter_context(recorder.activate())
+        yield
+
+
+def in_current_span(function):
+    """Binds 'function' to the current span, for calling it on another
+    thread. Its spans then show up where they would have, had it been
+    called right here. It is also profiled, if a profiler is active"""
+    recorder = _active_recorder
+    profiler = _active_profiler
+    if recorder is None and profiler is None:
+        return function
+
+    record = recorder.current() if recorder else None
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with contextlib.ExitStack() as stack:
+            if recorder:
+                stack.enter_context(recorder.resume(record))
+            if profiler:
+                stack.enter_context(profiler.profile_thread())
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+class ExportProfiler():
+    """Runs cProfile and tracemalloc while active.
+
+    cProfile only sees the thread it was enabled on, so work handed to other
+    threads through 'in_current_span' is profiled separately and merged when
+    saving. tracemalloc sees every thread, but only memory allocated through
+    Python, i.e. not the memory RAMSES allocates for itself"""
+
+    # Files written by 'save'
+    PROFILE_FILE = 'export.prof'
+    PROFILE_REPORT_FILE = 'export_profile.txt'
+    ALLOCATIONS_REPORT_FILE = 'export_allocations.txt'
+
+    def __init__(self, top: int = 50):
+        # Entries in the text reports
+        self.top = top
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._peak_bytes = 0
+
+    @contextlib.contextmanager
+    def activate(self):
+        global _active_profiler
+        previous = _active_profiler
+        _active_profiler = self
+
+        # Someone else might be tracing already, e.g. python -X tracemalloc
+        started_tracemalloc = not tracemalloc.is_tracing()
+        if started_tracemalloc:
+            tracemalloc.start()
+        if hasattr(tracemalloc, 'reset_peak'): # Python 3.9 onwards
+            tracemalloc.reset_peak()
+
+        try:
+            with self.profile_thread():
+                yield self
+        finally:
+            self._snapshot = tracemalloc.take_snapshot()
+            self._peak_bytes = max(self._peak_bytes, tracemalloc.get_traced_memory()[1])
+            if started_tracemalloc:
+                tracemalloc.stop()
+            _active_profiler = previous
+
+    @contextlib.contextmanager
+    def profile_thread(self):
+        """Profiles the calling thread while entered"""
+        profile = cProfile.Profile()
+
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12 onwards only allows one active cProfile at a time
+            log.debug('Could not profile thread %s, another profiler is active', threading.current_thread().name)
+            yield
+            return
+
+        with self._lock:
+            self._profiles.append(profile)
+
+        try:
+            yield
+        finally:
+            profile.disable()
+
+    def stats(self) -> pstats.Stats:
+        """The profiles of every thread, merged"""
+        stats = pstats.Stats(self._profiles[0], stream=io.StringIO())
+        for profile in self._profiles[1:]:
+            stats.add(profile)
+        return stats
+
+    def save(self, output_dir: str):
+        """Writes the cProfile data (for e.g. snakeviz or pstats), a text
+        report of the most expensive functions and one of the lines that
+        allocated the most memory still held at the end of the profile
+
+        Arguments:
+            output_dir {str} -- Directory to write PROFILE_FILE, \
+                PROFILE_REPORT_FILE and ALLOCATIONS_REPORT_FILE to
+        """
+        if not self._profiles or self._snapshot is None:
+            raise RuntimeError('Nothing was profiled.')
+
+        stats = self.stats()
+        stats.dump_stats(os.path.join(output_dir, self.PROFILE_FILE))
+
+        with open(os.path.join(output_dir, self.PROFILE_REPORT_FILE), 'w') as file:
+            stats.stream = file
+            stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+
+        snapshot = self._snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                                 tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+                                                 tracemalloc.Filter(False, '<unknown>')])
+        statistics = snapshot.statistics('lineno')
+
+        with open(os.path.join(output_dir, self.ALLOCATIONS_REPORT_FILE), 'w') as file:
+            file.write(f'Peak memory traced: {self._peak_bytes / 1024:.1f} KiB\n')
+            file.write(f'Still held at the end: {sum(stat.size for stat in statistics) / 1024:.1f} KiB\n')
+            file.write(f'Top {self.top} lines by memory still held:\n')
+            for stat in statistics[:self.top]:
+                file.write(f'{stat}\n')
+
+        log.debug('Wrote profiling reports to %s', output_dir)
@@ -12,13 +12,16 @@ import bpy
 import bmesh
 from . import RamsesPython
 from . import debug_utils
+from . import instrumentation
 from . import utils
 from . import shaders
 import mathutils
+import numpy
 from typing import List, Any, Dict
 import math
 import itertools
 import pathlib
+import copy
 
 log = debug_utils.get_debug_logger()
 
@@ -30,15 +33,25 @@ class SceneRepresentation():
     def __init__(self,
                  scene: bpy.types.Scene,
                  custom_params: Dict[str, utils.CustomParameters] = None,
-                 evaluate: bool = False):
+                 evaluate: bool = False,
+                 triangulation: str = 'LOOP_TRIANGLES',
+                 shader_library: shaders.ShaderLibrary = None):
         self.scene = scene
-        self.graph = SceneGraph(scene) # Entire scene
+        # Copied, so the name is available without touching Blender
+        self.name = scene.name
+        # Triangulated geometry, shared by every node using the same mesh datablock
+        self.mesh_cache = MeshDataCache(triangulation=triangulation)
+        self.graph = SceneGraph(scene, mesh_cache=self.mesh_cache) # Entire scene
         self.layers = [] # A graph for every layer. We can map these to RenderGroups
         if not custom_params:
             custom_params = {}
         self.custom_params = custom_params
-        self.shader_utils = shaders.ShaderUtils()
+        # Custom shaders are read through the library, usually shared by the whole export
+        self.shader_utils = shaders.ShaderUtils(library=shader_library)
         self.evaluate = evaluate
+        # ViewLayerNode -> the IR node of the scene camera in that layer,
+        # only resolved up front by 'detach'
+        self._layer_cameras = {}
 
     @property
     def camera(self):
@@ -47,6 +60,47 @@ class SceneRepresentation():
             raise RuntimeError('Please set the scene camera in Blender.')
         return camera
 
+    def camera_node(self, layer: ViewLayerNode) -> Node:
+        """Returns the IR node the scene camera got translated to in 'layer'
+
+        Arguments:
+            layer {ViewLayerNode} -- One of the layers of this scene
+
+        Raises:
+            RuntimeError: Raised when the scene camera is not part of the layer
+
+        Returns:
+            Node -- The camera node
+        """
+
+        camera_node = self._layer_cameras.get(layer)
+        if camera_node is not None:
+            return camera_node
+
+        camera = self.camera
+
+        if self.evaluate:
+            camera = camera.evaluated_get(layer.depsgraph)
+
+        found = layer.find_from_blender_object(camera)
+        if len(found) != 1:
+            raise RuntimeError('Did you exclude the scene camera from the view layer?')
+
+        return found[0]
+
+    def detach(self):
+        """Copies everything a RAMSES build reads out of Blender, i.e. values
+        of the nodes, the geometry of meshes and the camera of every layer.
+        The layers can then be translated without touching Blender, e.g. on
+        a worker thread. Must be called on the main thread, after 'build_ir'"""
+
+        for layer in self.layers:
+            # Finding the camera reads from Blender
+            self._layer_cameras[layer] = self.camera_node(layer)
+            for node in layer.traverse():
+                node.detach()
+
+    @instrumentation.timed
     def build_ir(self):
         """Builds the intermediary representation from the Blender
         scene"""
@@ -59,6 +113,7 @@ class SceneRepresentation():
         self._doCustomParams_ForSceneGraph(self.custom_params)
         self._doCustomParams_ForLayers(self.custom_params)
 
+    @instrumentation.timed
     def do_view_layers(self, evaluate: bool = False):
         for view_layer in self.scene.view_layers:
             if view_layer.use:
@@ -69,8 +124,34 @@ class SceneRepresentation():
 
                 self.layers.append(layer_node)
 
+    def iter_view_layers(self):
+        """Builds the intermediary representation one view layer at a time,
+        for streaming exports.
+
+        Neither the scene-wide graph nor 'layers' get populated, so as long
+        as the caller tears down every layer once it is done with it, only
+        a single layer is ever kept in memory.
+
+        Yields:
+            ViewLayerNode -- A fully built layer, with custom parameters applied
+        """
+
+        for view_layer in self.scene.view_layers:
+            if view_layer.use:
+                layer_node = ViewLayerNode(self.graph, view_layer)
+
+                if self.evaluate:
+                    layer_node.evaluate()
+
+                self._doCustomParams(self.custom_params, layer_node)
+                yield layer_node
+
+    @instrumentation.timed
     def teardown(self):
+        self._layer_cameras.clear()
         self.graph.teardown()
+        for layer in self.layers:
+            layer.teardown()
 
     def _doCustomParams(self, custom_params, graph):
         for scene_object_name, params in custom_params.items():
@@ -83,7 +164,7 @@ class SceneRepresentation():
 
             if not node:
                 # Malformed meshes or other issues
-                log.debug(f'Specified extra parameters for object {blender_object.name} but it did not get translated.')
+                log.debug('Specified extra parameters for object %s but it did not get translated.', blender_object.name)
                 return
 
             node = node[0]
@@ -112,6 +193,30 @@ class SceneRepresentation():
 class Node():
     """A base class for operations every node must support"""
 
+    # Nodes can number in the hundreds of thousands, so no per-node __dict__.
+    # Every subclass must declare its own __slots__, even if empty.
+    __slots__ = ('parent',
+                 'children',
+                 'blender_object',
+                 'name',
+                 'location',
+                 'rotation',
+                 'rotation_order',
+                 'matrix_basis',
+                 'matrix_local',
+                 'matrix_parent_inverse',
+                 'matrix_world',
+                 'dimensions',
+                 'color',
+                 'scale',
+                 'vertex_groups',
+                 'up_axis',
+                 'forward_axis',
+                 'users_scene',
+                 'users_collections',
+                 'vertex_shader',
+                 'fragment_shader')
+
     def __init__(self, blender_object: bpy.types.Object = None, name=''):
         self.parent = None
         self.children = []
@@ -124,17 +229,17 @@ class Node():
         # See https://docs.blender.org/api/master/bpy.types.Object.html
         # Matrix access to location, rotation and scale (including deltas),
         # before constraints and parenting are applied
-        self.matrix_basis = mathutils.Matrix().to_4x4().identity()
+        self.matrix_basis = mathutils.Matrix.Identity(4)
         # Parent relative transformation matrix - WARNING: Only takes into
         # account ‘Object’ parenting, so e.g. in case of bone parenting you
         # get a matrix relative to the Armature object, not to the actual
         # parent bone
-        self.matrix_local = mathutils.Matrix().to_4x4().identity()
+        self.matrix_local = mathutils.Matrix.Identity(4)
         # Inverse of object’s parent matrix at time of parenting
-        self.matrix_parent_inverse = mathutils.Matrix().to_4x4().identity()
+        self.matrix_parent_inverse = mathutils.Matrix.Identity(4)
         # Worldspace transformation matrix, that is, the matrix that transforms
         # into the viewport's coordinate system
-        self.matrix_world = mathutils.Matrix().to_4x4().identity()
+        self.matrix_world = mathutils.Matrix.Identity(4)
 
         self.dimensions = mathutils.Vector((0.0, 0.0, 0.0))
         self.color = mathutils.Vector((0.0, 0.0, 0.0))
@@ -199,15 +304,7 @@ class Node():
 
     def contains(self, node: Node) -> bool:
         """Whether this node or its children contains the argument"""
-        if self == node:
-            return True
-
-        for child in self.children:
-            found = child.contains(node)
-            if found:
-                return found
-
-        return False
+        return any(current == node for current in self.traverse())
 
     def node_count(self) -> int:
         """Counts the number of nodes in the hierarchy
@@ -215,13 +312,39 @@ class Node():
         Returns:
             int -- The number of nodes in the hierarchy
         """
-        return len([node for node in self.traverse()])
+        return sum(1 for _ in self.traverse())
+
+    @classmethod
+    def attribute_names(cls) -> Dict[str, str]:
+        """Maps the lowercase name of every attribute a node of this type has
+        to its actual name. Computed once per class from the __slots__ along
+        the class hierarchy
+
+        Returns:
+            Dict[str, str] -- lowercase name -> attribute name
+        """
+        names = cls.__dict__.get('_attribute_names')
+
+        if names is None:
+            names = {}
+            for klass in reversed(cls.__mro__):
+                slots = klass.__dict__.get('__slots__', ())
+                if isinstance(slots, str):
+                    slots = (slots,)
+                for slot in slots:
+                    names.setdefault(slot.lower(), slot)
+
+            # Lives in the class, which unlike its instances has a __dict__
+            cls._attribute_names = names
+
+        return names
 
     def find(self, attribute: str, value: Any, n: int = 1) -> List[Node]:
         """Search the hierarchy looking for nodes in which attribute == value
 
         Arguments:
-            attribute {str} -- Any attribute contained in node.__dict__
+            attribute {str} -- Any attribute in node.attribute_names(), \
+                matched case-insensitively
             value {Any} -- Any value to look for
             n {int} -- The number of matches to return. Defaults to 1 \
                 and a value of 0 returns all matches
@@ -235,21 +358,17 @@ class Node():
 
         matches = []
 
-        for attr, val in self.__dict__.items():
-            if n and (len(matches) == n):
-                break
-
-            if attr.lower() == attribute.lower():
-                if val and (val == value):
-                    matches.append(self)
+        for node in self.traverse():
+            attr = node.attribute_names().get(attribute.lower())
+            if not attr:
+                continue
 
-        for child in self.children:
-            if n and (len(matches) == n):
-                break
+            val = getattr(node, attr, None)
+            if val and (val == value):
+                matches.append(node)
 
-            found = child.find(attribute, value, n)
-            if found:
-                matches.extend(found)
+                if n and (len(matches) == n):
+                    break
 
         return matches
 
@@ -271,6 +390,30 @@ class Node():
         node.parent = self
         self.children.append(node)
 
+    def instance(self) -> Node:
+        """Returns a shallow copy of this node with no parent and no children,
+        so an already translated object can be placed in another hierarchy"""
+        node = copy.copy(self)
+        node.parent = None
+        node.children = []
+        return node
+
+    def detach(self):
+        """Replaces the values still backed by Blender data with copies.
+        'blender_object' and its collections are kept, but not read
+        anymore when translating"""
+        for attribute in ('location',
+                          'rotation',
+                          'scale',
+                          'matrix_basis',
+                          'matrix_local',
+                          'matrix_parent_inverse',
+                          'matrix_world',
+                          'dimensions'):
+            setattr(self, attribute, getattr(self, attribute).copy())
+
+        self.color = mathutils.Vector(self.color)
+
     def get_before_parenting_transform(self): return self.matrix_basis
     def get_transform_relative_to_parent(self): return self.matrix_local
     def get_parent_inverse_transform(self): return self.matrix_parent_inverse
@@ -293,15 +436,37 @@ class Node():
         return list(itertools.chain.from_iterable(a_iterable))
 
     def teardown(self):
-        for child in self.children:
-            child.teardown()
-        del self
+        """Tears down the hierarchy, children before their parents"""
+        for node in self.traverse_post_order():
+            node.release()
+
+    def release(self):
+        """Releases the resources held by this node alone. Override this
+        instead of 'teardown' in derived types"""
 
     def traverse(self):
-        yield self
+        """Yields every node in the hierarchy, parents before their children.
+        Uses an explicit stack, so the depth of the hierarchy is not limited
+        by the recursion limit"""
+        stack = [self]
+
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
+    def traverse_post_order(self):
+        """Yields every node in the hierarchy, children before their parents"""
+        stack = [(self, False)]
 
-        for child in self.children:
-            yield from child.traverse()
+        while stack:
+            node, children_done = stack.pop()
+
+            if children_done:
+                yield node
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children))
 
     def update(self):
         """Update this node when previous access to data or operators changes it.
@@ -310,14 +475,62 @@ class Node():
     def __str__(self):
         return f'IRNode of type: {type(self)} and name: {self.name}'
 
+class BlenderObjectIndex():
+    """Maps Blender objects to the IR nodes created from them, so lookups
+    do not have to walk the whole hierarchy"""
+
+    def __init__(self):
+        # Keyed by 'name_full' so evaluated copies of an object, which share
+        # the name with their original, land in the same bucket
+        self._nodes = {}
+
+    def add(self, node: Node):
+        if node.blender_object is None:
+            return
+
+        self._nodes.setdefault(node.blender_object.name_full, []).append(node)
+
+    def find(self, blender_object: bpy.types.Object) -> List[Node]:
+        """Returns the nodes created from 'blender_object', in the order they
+        were added
+
+        Arguments:
+            blender_object {bpy.types.Object} -- The object to look for
+
+        Returns:
+            List[Node] -- A list with matches
+        """
+        if blender_object is None:
+            return []
+
+        candidates = self._nodes.get(blender_object.name_full, [])
+        # Nodes might have had their object replaced in the meantime,
+        # i.e. by its evaluated version, so check again
+        return [node for node in candidates if node.blender_object == blender_object]
+
+    def __len__(self):
+        return sum(len(nodes) for nodes in self._nodes.values())
+
+
 class SceneGraph():
     """For every scene, a graph is created so we can translate concepts as close as possible"""
 
-    def __init__(self, scene: bpy.types.Scene, root: Node = None, shader_utils: shaders.ShaderUtils = None):
+    def __init__(self,
+                 scene: bpy.types.Scene,
+                 root: Node = None,
+                 shader_utils: shaders.ShaderUtils = None,
+                 mesh_cache: MeshDataCache = None,
+                 source: SceneGraph = None):
         self.root = root if root else Node(name='Root node')
         self.scene = scene
         self.shader_utils = shader_utils if shader_utils else shaders.ShaderUtils()
+        self.mesh_cache = mesh_cache if mesh_cache is not None else MeshDataCache()
+        self.index = BlenderObjectIndex()
+        # An optional graph that already translated the same objects.
+        # Its nodes get instanced instead of being translated again
+        self.source = source
 
+    @instrumentation.timed(describe=lambda self, o=None, parent=None: {'object': o.name_full if o else None})
     def add_node(self, o: bpy.types.Object = None, parent: Node = None) -> Node:
 
         node = self._translate(o) if o else Node('Placeholder node')
@@ -325,17 +538,19 @@ class SceneGraph():
 
         if self.is_uninitialized():
             node.name += ' ' + '(Root node)'
-            log.debug(f'No root node for this SceneGraph, adding {str(node)} as root')
+            log.debug('No root node for this SceneGraph, adding %s as root', node)
             self.root = node
             node.parent = None
         else:
             node_parent = parent if parent else self._resolve_parenting(o)
             node_parent.add_child(node)
 
+        self.index.add(node)
+
         assert self.root
         assert self.root.parent is None
 
-        log.debug(f'Scene graph: adding "{node}" with Blender Object: "{o}". Parent is: "{node_parent}"')
+        log.debug('Scene graph: adding "%s" with Blender Object: "%s". Parent is: "%s"', node, o, node_parent)
         return node
 
     def _translate(self, o: bpy.types.Object) -> Node:
@@ -352,12 +567,16 @@ class SceneGraph():
         # See also https://docs.blender.org/manual/en/dev/editors/3dview/object/index.html
         node = None
 
-        if o.type == 'MESH':
-            node = MeshNode(o)
+        translated = self.source.find_from_blender_object(o) if self.source else []
+
+        if translated:
+            node = translated[0].instance()
+
+        elif o.type == 'MESH':
+            node = MeshNode(o, mesh_cache=self.mesh_cache)
 
             if node.malformed():
-                log.debug(f'Malformed mesh with no faces: {str(node)}. '
-                          + 'Adding placeholder.')
+                log.debug('Malformed mesh with no faces: %s. Adding placeholder.', node)
                 old_node = node
                 node = Node(blender_object=old_node.blender_object,
                             name='Placeholder node for malformed '
@@ -387,13 +606,12 @@ class SceneGraph():
 
         else: # TODO: map EMPTIES to Node() ?
 
-            log.debug( f'IR SceneGraph: found node: {o.name} of type: {o.type} '
-                      + 'in Blender which is currently not implemented. Adding '
-                      + 'a placeholder node.')
+            log.debug('IR SceneGraph: found node: %s of type: %s in Blender which is currently '
+                      + 'not implemented. Adding a placeholder node.', o.name, o.type)
 
             node = Node(name=f'Unresolved Blender node: {str(o)} of type {o.type}')
 
-        log.debug(f'Translated Blender object: {o.name} of type: {o.type} into {str(node)}')
+        log.debug('Translated Blender object: %s of type: %s into %s', o.name, o.type, node)
         return node
 
     def _resolve_parenting(self,
@@ -401,7 +619,7 @@ class SceneGraph():
         """Attempts to find a parent for the argument in the graph. \
             Uses the root node if no candidate node is found at first"""
 
-        parent_candidates = self.root.find_from_blender_object(blender_object.parent)
+        parent_candidates = self.index.find(blender_object.parent)
 
         return parent_candidates[0] if parent_candidates else self.root
 
@@ -459,7 +677,7 @@ class SceneGraph():
         Returns:
             List[Node] -- A list with matches
         """
-        return self.root.find_from_blender_object(blender_object=blender_object)
+        return self.index.find(blender_object)
 
     def debug(self):
         """A convenience method so we can quickly check if a node does not
@@ -488,44 +706,267 @@ class SceneGraph():
         return ret
 
     def pretty_print_graph(self, current_node, indentation=0):
-        current_string = (' ' * indentation) + str(current_node) + '\n'
-        indentation += 4
+        lines = []
+        stack = [(current_node, indentation)]
+
+        while stack:
+            node, node_indentation = stack.pop()
+            lines.append((' ' * node_indentation) + str(node) + '\n')
+            stack.extend((child, node_indentation + 4) for child in reversed(node.children))
+
+        return ''.join(lines)
+
+
+class MeshData():
+    """Geometry extracted from a mesh datablock. A single instance is shared
+    by all MeshNodes whose objects use the same datablock.
+
+    Nothing is read from Blender until the geometry is first asked for, and
+    free() drops it again once it has been handed over to RAMSES"""
+
+    # Triangles come from Blender's own loop triangles, cached natively
+    LOOP_TRIANGLES = 'LOOP_TRIANGLES'
+    # Triangles come from a BMesh copy run through bmesh.ops.triangulate.
+    # Slower, kept as a fallback
+    BMESH = 'BMESH'
+
+    def __init__(self,
+                 key,
+                 blender_object: bpy.types.Object,
+                 triangulation: str = LOOP_TRIANGLES):
+        assert triangulation in (MeshData.LOOP_TRIANGLES, MeshData.BMESH)
+
+        self.key = key
+        self.users = 0
+        self.blender_object = blender_object
+        self.triangulation = triangulation
+        self._bmesh = None
+        # Flat float32 positions and uint32 triangle indices
+        self._positions = None
+        self._indices = None
+        # Kept after free(), so sizes can still be reported
+        self._vertex_count = None
+        self._triangle_count = None
+
+    def materialize(self):
+        """Extracts the geometry from Blender, unless already done"""
+        if self._positions is not None:
+            return
+
+        with instrumentation.span('MeshData.materialize', object=self.blender_object.name_full) as tags:
+            mesh = self.blender_object.to_mesh()
+
+            if self.triangulation == MeshData.BMESH or not hasattr(mesh, 'loop_triangles'):
+                self.triangulation = MeshData.BMESH
+                if self._bmesh is None:
+                    self._bmesh = self._bmesh_from_mesh(mesh)
+                self._positions, self._indices = self._arrays_from_bmesh(self._bmesh)
+            else:
+                self._positions, self._indices = MeshData.extract_arrays(mesh)
+
+            # Everything was copied out, so the temporary mesh can go right away
+            self.blender_object.to_mesh_clear()
 
-        for child in current_node.children:
-            current_string += self.pretty_print_graph(child, indentation)
+            self._vertex_count = len(self._positions) // 3
+            self._triangle_count = len(self._indices) // 3
+            tags.update(triangulation=self.triangulation,
+                        vertices=self._vertex_count,
+                        triangles=self._triangle_count)
 
-        return current_string
+        log.debug('Extracted %d vertices and %d triangles for mesh data: %s',
+                  self._vertex_count, self._triangle_count, self.key)
+
+    def is_materialized(self) -> bool:
+        return self._positions is not None
+
+    @property
+    def positions(self) -> numpy.ndarray:
+        self.materialize()
+        return self._positions
+
+    @property
+    def indices(self) -> numpy.ndarray:
+        self.materialize()
+        return self._indices
+
+    @property
+    def mesh(self) -> bmesh.types.BMesh:
+        """A BMesh copy of the geometry. Only built when asked for if the
+        triangles come from loop triangles"""
+        if self._bmesh is None:
+            self._bmesh = self._bmesh_from_mesh(self.blender_object.to_mesh())
+            self.blender_object.to_mesh_clear()
+        return self._bmesh
+
+    def _bmesh_from_mesh(self, mesh: bpy.types.Mesh) -> bmesh.types.BMesh:
+        bmesh_handle = bmesh.new()
+        bmesh_handle.from_mesh(mesh)
+        log.debug('Instantiated BMesh %s for mesh data: %s', bmesh_handle, self.key)
+
+        MeshNode.triangulate_mesh(mesh=bmesh_handle, faces=bmesh_handle.faces)
+        log.debug('Triangulated mesh: %s', bmesh_handle)
+
+        return bmesh_handle
+
+    @staticmethod
+    def _arrays_from_bmesh(bmesh_handle: bmesh.types.BMesh):
+        """Fallback for extract_arrays() that walks a triangulated BMesh"""
+        positions = numpy.array([component for vertex in bmesh_handle.verts for component in vertex.co],
+                                dtype=numpy.float32)
+        indices = numpy.array([vertex.index for face in bmesh_handle.faces for vertex in face.verts],
+                              dtype=numpy.uint32)
+        return positions, indices
+
+    @staticmethod
+    def extract_arrays(mesh: bpy.types.Mesh):
+        """Reads vertex positions and triangle indices from 'mesh' in bulk,
+        with no per-element work done in Python.
+
+        Arguments:
+            mesh {bpy.types.Mesh} -- The mesh to read from
+
+        Returns:
+            Tuple[numpy.ndarray, numpy.ndarray] -- Flat float32 positions and \
+                flat uint32 indices, three per triangle
+        """
+        mesh.calc_loop_triangles()
+
+        positions = numpy.empty(len(mesh.vertices) * 3, dtype=numpy.float32)
+        mesh.vertices.foreach_get('co', positions)
+
+        indices = numpy.empty(len(mesh.loop_triangles) * 3, dtype=numpy.uint32)
+        mesh.loop_triangles.foreach_get('vertices', indices)
+
+        return positions, indices
+
+    def count(self):
+        """Counts vertices and triangles without extracting or triangulating
+        anything. Every polygon of n corners makes n - 2 triangles, as many
+        as either triangulation produces"""
+        if self._vertex_count is not None:
+            return
+
+        mesh = self.blender_object.to_mesh()
+        self._vertex_count = len(mesh.vertices)
+        self._triangle_count = len(mesh.loops) - 2 * len(mesh.polygons)
+        self.blender_object.to_mesh_clear()
+
+    def vertex_count(self) -> int:
+        if self._vertex_count is None:
+            self.materialize()
+        return self._vertex_count
+
+    def triangle_count(self) -> int:
+        if self._triangle_count is None:
+            self.materialize()
+        return self._triangle_count
+
+    def free(self):
+        """Drops the extracted geometry. It is extracted again if asked for"""
+        if self._bmesh is not None:
+            log.debug('Freeing allocated BMesh object: "%s"', self._bmesh)
+            self._bmesh.free()
+            self._bmesh = None
+
+        self._positions = None
+        self._indices = None
+
+
+class MeshDataCache():
+    """Extracts and triangulates every unique mesh only once, handing out
+    shared MeshData to the MeshNodes that use it"""
+
+    def __init__(self, triangulation: str = 'LOOP_TRIANGLES'):
+        self.triangulation = triangulation
+        self._entries = {}
+
+    @staticmethod
+    def key(blender_object: bpy.types.Object):
+        """Objects share geometry when they use the same mesh datablock,
+        unless they are evaluated and have modifiers of their own"""
+        evaluated = getattr(blender_object, 'is_evaluated', False)
+        owner = blender_object.name_full if evaluated and len(blender_object.modifiers) else None
+        return (blender_object.data.name_full, evaluated, owner)
+
+    def acquire(self, blender_object: bpy.types.Object) -> MeshData:
+        key = self.key(blender_object)
+        mesh_data = self._entries.get(key)
+
+        if mesh_data is None:
+            mesh_data = MeshData(key, blender_object, triangulation=self.triangulation)
+            self._entries[key] = mesh_data
+        else:
+            log.debug('Reusing mesh data %s for %s', key, blender_object.name_full)
+
+        return self.retain(mesh_data)
+
+    def retain(self, mesh_data: MeshData) -> MeshData:
+        """Registers one more user of already extracted mesh data"""
+        mesh_data.users += 1
+        return mesh_data
+
+    def release(self, mesh_data: MeshData):
+        mesh_data.users -= 1
+        assert mesh_data.users >= 0
+
+        if mesh_data.users == 0:
+            del self._entries[mesh_data.key]
+            mesh_data.free()
+
+    def __len__(self):
+        return len(self._entries)
 
 
 class MeshNode(Node):
     """A class for meshes that tries to provide its data in a way an
     OpenGL-powered renderer would expect"""
 
-    def __init__(self, blender_object: bpy.types.Object):
+    __slots__ = ('mesh_cache', 'mesh_data', 'vertexformat')
+
+    def __init__(self, blender_object: bpy.types.Object, mesh_cache: MeshDataCache = None):
         super().__init__(blender_object, name = blender_object.name_full)
-        self.mesh = None
+        self.mesh_cache = mesh_cache if mesh_cache is not None else MeshDataCache()
+        self.mesh_data = None
         self.vertexformat = {}
         self.init_memory_mesh()
 
-    def teardown(self):
-        super().teardown()
-        log.debug(f'Freeing allocated BMesh object: "{self.mesh}"')
-        self.mesh.free()
+    @property
+    def mesh(self):
+        """The triangulated BMesh, possibly shared with other nodes"""
+        return self.mesh_data.mesh if self.mesh_data else None
+
+    def release(self):
+        self.release_memory_mesh()
+
+    def detach(self):
+        super().detach()
+        if self.mesh_data:
+            self.mesh_data.materialize()
+
+    def instance(self) -> MeshNode:
+        node = super().instance()
+        if node.mesh_data:
+            self.mesh_cache.retain(node.mesh_data)
+        return node
 
     def malformed(self):
-        faces = self.get_faces()
-        return len(faces) == 0
+        # Cheap enough to not extract any geometry
+        return len(self.blender_object.data.polygons) == 0
 
-    def init_memory_mesh(self, triangulate=True):
-        bmesh_handle = bmesh.new()
-        bmesh_handle.from_mesh(self.blender_object.to_mesh())
-        log.debug(f'Instantiated BMesh {bmesh_handle} for MeshNode: {self.name}')
+    def init_memory_mesh(self):
+        self.mesh_data = self.mesh_cache.acquire(self.blender_object)
+        log.debug('Using mesh data %s for MeshNode: %s', self.mesh_data.key, self.name)
 
-        if triangulate:
-            MeshNode.triangulate_mesh(mesh=bmesh_handle, faces=bmesh_handle.faces)
-            log.debug(f'Triangulated mesh: {bmesh_handle}')
+    def release_memory_mesh(self):
+        if self.mesh_data:
+            self.mesh_cache.release(self.mesh_data)
+            self.mesh_data = None
 
-        self.mesh = bmesh_handle
+    def release_geometry(self):
+        """Frees the extracted geometry while keeping the node usable, i.e.
+        after it has been copied into RAMSES"""
+        if self.mesh_data:
+            self.mesh_data.free()
 
     @staticmethod
     def triangulate_mesh(mesh, faces):
@@ -540,10 +981,13 @@ class MeshNode(Node):
         self.mesh.verts.ensure_lookup_table()
         return self.mesh.verts
 
+    def get_vertex_array(self) -> numpy.ndarray:
+        """Returns the vertex positions as a flat float32 array"""
+        return self.mesh_data.positions
+
     def get_vertex_buffer(self) -> List[float]:
         """Returns an unpacked vertex buffer suitable for rendering engines"""
-        vertices = self.get_vertices()
-        return self.vector_unpack(vertices)
+        return self.get_vertex_array().tolist()
 
     def get_normal_buffer(self, b_use_vertex_normals=True):
         """Returns an unpacked normal buffer suitable for rendering engines"""
@@ -566,15 +1010,12 @@ class MeshNode(Node):
         self.mesh.faces.ensure_lookup_table()
         return self.mesh.faces
 
-    def get_indices(self) -> List[int]:
-        faces = self.get_faces()
-        indices = []
-
-        for face in faces:
-            for vertex in face.verts:
-                indices.append(vertex.index)
+    def get_index_array(self) -> numpy.ndarray:
+        """Returns the triangle indices as a flat uint32 array"""
+        return self.mesh_data.indices
 
-        return indices
+    def get_indices(self) -> List[int]:
+        return self.get_index_array().tolist()
 
     def get_textures(self):
         pass
@@ -590,10 +1031,21 @@ class MeshNode(Node):
         print(self.get_indices())
 
     def update(self):
-        self.mesh.free()
+        self.release_memory_mesh()
         self.init_memory_mesh()
 
 class CameraNode(Node):
+    __slots__ = ('fov',
+                 'horizontal_fov',
+                 'vertical_fov',
+                 'z_near',
+                 'z_far',
+                 'sensor_fit',
+                 'sensor_height',
+                 'sensor_width',
+                 'shift_x',
+                 'shift_y')
+
     def __init__(self, blender_object: bpy.types.Object):
 
         super().__init__(blender_object=blender_object,
@@ -619,6 +1071,8 @@ class CameraNode(Node):
 
 
 class PerspectiveCameraNode(CameraNode):
+    __slots__ = ('scene', 'width', 'height', 'aspect_ratio')
+
     def __init__(self, blender_object: bpy.types.Object, scene: bpy.types.Scene):
 
         super().__init__(blender_object=blender_object)
@@ -644,6 +1098,8 @@ class PerspectiveCameraNode(CameraNode):
 
 
 class OrthographicCameraNode(CameraNode):
+    __slots__ = ('x_mag', 'y_mag')
+
     def __init__(self, blender_object: bpy.types.Object):
 
         super().__init__(blender_object=blender_object)
@@ -652,7 +1108,44 @@ class OrthographicCameraNode(CameraNode):
         self.y_mag = blender_object.data.ortho_scale
 
 
+class LightShadowParameters():
+    """The shadow settings of a Light. Nothing in the export uses them yet,
+    so they are only read from Blender once asked for through LightNode.shadow"""
+
+    __slots__ = ('contact_shadow_bias',
+                 'contact_shadow_distance',
+                 'contact_shadow_soft_size',
+                 'contact_shadow_thickness',
+                 'shadow_buffer_bias',
+                 'shadow_buffer_bleed_bias',
+                 'shadow_buffer_clip_end',
+                 'shadow_buffer_clip_start',
+                 'shadow_buffer_exp',
+                 'shadow_buffer_samples',
+                 'shadow_buffer_soft',
+                 'shadow_color',
+                 'shadow_soft_size',
+                 # Sun lights only
+                 'shadow_cascade_count',
+                 'shadow_cascade_exponent',
+                 'shadow_cascade_fade',
+                 'shadow_cascade_max_distance')
+
+    def __init__(self, light: bpy.types.Light):
+        for attribute in self.__slots__:
+            # Light types lacking a setting get None
+            setattr(self, attribute, getattr(light, attribute, None))
+
+
 class LightNode(Node):
+    __slots__ = ('cutoff_distance',
+                 'distance',
+                 'node_tree',
+                 'specular_factor',
+                 'use_nodes',
+                 'energy',
+                 '_shadow')
+
     def __init__(self, blender_object: bpy.types.Object):
 
         super().__init__(blender_object=blender_object,
@@ -667,28 +1160,31 @@ class LightNode(Node):
         self.specular_factor = blender_object.data.specular_factor
         self.use_nodes = False # TODO
 
-        self.contact_shadow_bias = blender_object.data.contact_shadow_bias
-        self.contact_shadow_distance = blender_object.data.contact_shadow_distance
-        self.contact_shadow_soft_size = blender_object.data.contact_shadow_soft_size
-        self.contact_shadow_thickness = blender_object.data.contact_shadow_thickness
-
         self.energy = blender_object.data.energy
 
-        self.shadow_buffer_bias = blender_object.data.shadow_buffer_bias
-        self.shadow_buffer_bleed_bias = blender_object.data.shadow_buffer_bleed_bias
-        self.shadow_buffer_clip_end = blender_object.data.shadow_buffer_clip_end
-        self.shadow_buffer_clip_start = blender_object.data.shadow_buffer_clip_start
-        self.shadow_buffer_exp = blender_object.data.shadow_buffer_exp
-        self.shadow_buffer_samples = blender_object.data.shadow_buffer_samples
-        self.shadow_buffer_soft = blender_object.data.shadow_buffer_soft
-        self.shadow_color = blender_object.data.shadow_color
-        self.shadow_soft_size = blender_object.data.shadow_soft_size
+        # See 'shadow'
+        self._shadow = None
+
+    @property
+    def shadow(self) -> LightShadowParameters:
+        """The shadow settings of the light, read from Blender on first access"""
+        if self._shadow is None:
+            self._shadow = LightShadowParameters(self.blender_object.data)
+        return self._shadow
 
 
 
 class PointLightNode(LightNode):
     """Omnidirectional point Light"""
 
+    __slots__ = ('constant_coefficient',
+                 'falloff_curve',
+                 'falloff_type',
+                 'linear_attenuation',
+                 'quadratic_coefficient',
+                 'use_contact_shadow',
+                 'use_shadow')
+
     def __init__(self, blender_object: bpy.types.Object):
 
         super().__init__(blender_object=blender_object)
@@ -711,6 +1207,17 @@ class PointLightNode(LightNode):
 class SpotLightNode(LightNode):
     """Directional cone Light"""
 
+    __slots__ = ('constant_coefficient',
+                 'falloff_curve',
+                 'falloff_type',
+                 'linear_attenuation',
+                 'quadratic_coefficient',
+                 'show_cone',
+                 'spot_size',
+                 'use_contact_shadow',
+                 'use_shadow',
+                 'use_square')
+
     def __init__(self, blender_object: bpy.types.Object):
 
         super().__init__(blender_object=blender_object)
@@ -738,6 +1245,8 @@ class SpotLightNode(LightNode):
 class SunLightNode(LightNode):
     """Constant direction parallel ray Light"""
 
+    __slots__ = ('angle', 'use_contact_shadow', 'use_shadow')
+
     def __init__(self, blender_object: bpy.types.Object):
 
         super().__init__(blender_object=blender_object)
@@ -748,17 +1257,22 @@ class SunLightNode(LightNode):
 
         self.angle=blender_object.data.angle
 
-        self.shadow_cascade_count=blender_object.data.shadow_cascade_count
-        self.shadow_cascade_exponent=blender_object.data.shadow_cascade_exponent
-        self.shadow_cascade_fade=blender_object.data.shadow_cascade_fade
-        self.shadow_cascade_max_distance = blender_object.data.shadow_cascade_max_distance
-
         self.use_contact_shadow = blender_object.data.use_contact_shadow
         self.use_shadow = blender_object.data.use_shadow
 
 
 class AreaLightNode(LightNode):
     """Directional area Light"""
+
+    __slots__ = ('constant_coefficient',
+                 'falloff_curve',
+                 'falloff_type',
+                 'linear_attenuation',
+                 'quadratic_coefficient',
+                 'shape',
+                 'size',
+                 'size_y')
+
     def __init__(self, blender_object: bpy.types.Object):
 
         super().__init__(blender_object=blender_object)
@@ -774,20 +1288,31 @@ class AreaLightNode(LightNode):
         self.linear_attenuation = blender_object.data.linear_attenuation
         self.quadratic_coefficient = blender_object.data.quadratic_coefficient
 
-
-        self.shadow_color = blender_object.data.shadow_color
-        self.shadow_soft_size = blender_object.data.shadow_soft_size
-
         self.shape=blender_object.data.shape
         self.size = blender_object.data.size
         self.size_y=blender_object.data.size_y
 
 
+def keeps_render_order(collection: bpy.types.Collection) -> bool:
+    """Whether the meshes of a collection must be rendered in the order
+    they appear in, even if the render order is optimized. Set through the
+    'ramses_keep_render_order' custom property of the collection"""
+    return bool(collection.get('ramses_keep_render_order', False))
+
+
 class ViewLayerNode(Node):
     """A node that represents a Blender View Layer.
     Besides splitting up a render into multiple layers for compositing,
     they can now also be used as multiple views and variations of a scene for editing"""
 
+    __slots__ = ('scene_graph',
+                 'view_layer',
+                 'use',
+                 'layer_collection',
+                 'depsgraph',
+                 'index',
+                 'keep_render_order')
+
     def __init__(self, scene_graph: SceneGraph, view_layer: bpy.types.ViewLayer):
 
         super().__init__(name=f'{view_layer.name}')
@@ -803,20 +1328,29 @@ class ViewLayerNode(Node):
         self.layer_collection = view_layer.layer_collection
         # The dependency graph to evaluate objects against
         self.depsgraph = view_layer.depsgraph
+        # Objects directly in the scene collection are rendered in order
+        self.keep_render_order = keeps_render_order(self.layer_collection.collection)
+        # Every object node in this view layer, including the ones nested in collections
+        self.index = BlenderObjectIndex()
 
         for child_collection in self.view_layer.layer_collection.children:
             # A view layer might have children collections
             if not child_collection.exclude:
-                node = LayerCollectionNode(self.scene_graph, child_collection)
+                node = LayerCollectionNode(self.scene_graph, child_collection, index=self.index)
                 self.children.append(node)
 
         # A view layer might have objects of its own
-        graph = SceneGraph(self.scene_graph.scene)
+        graph = SceneGraph(self.scene_graph.scene,
+                           mesh_cache=self.scene_graph.mesh_cache,
+                           source=self.scene_graph)
         for o in self.layer_collection.collection.objects:
-            graph.add_node(o)
+            self.index.add(graph.add_node(o))
 
         self.children.extend(graph.root.children)
 
+    def find_from_blender_object(self, blender_object: bpy.types.Object) -> List[Node]:
+        return self.index.find(blender_object)
+
     def evaluate(self):
         """Evaluates the ViewLayer and its hierarchy, applying modifiers and deformations"""
         # Replace the object by the evaluated version,
@@ -840,7 +1374,18 @@ class ViewLayerNode(Node):
 class LayerCollectionNode(Node):
     """A node that represents a wrapper over Blender Collections"""
 
-    def __init__(self, scene_graph: SceneGraph, layer_collection: bpy.types.LayerCollection):
+    __slots__ = ('scene_graph',
+                 'layer_collection',
+                 'collection',
+                 'exclude',
+                 'is_visible',
+                 'index',
+                 'keep_render_order')
+
+    def __init__(self,
+                 scene_graph: SceneGraph,
+                 layer_collection: bpy.types.LayerCollection,
+                 index: BlenderObjectIndex = None):
 
         super().__init__(name=f'{layer_collection.name}')
         self.scene_graph = scene_graph
@@ -848,15 +1393,21 @@ class LayerCollectionNode(Node):
         self.collection = self.layer_collection.collection
         self.exclude = self.layer_collection.exclude
         self.is_visible = self.layer_collection.is_visible
+        # Meshes are rendered in the order they appear in the collection
+        self.keep_render_order = keeps_render_order(self.collection)
+        # Usually shared with the enclosing ViewLayerNode
+        self.index = index if index is not None else BlenderObjectIndex()
 
         for child_layer_collection in self.layer_collection.children:
             # A collection might have nested collections
             if not child_layer_collection.exclude:
-                self.children.append(LayerCollectionNode(self.scene_graph, child_layer_collection))
+                self.children.append(LayerCollectionNode(self.scene_graph, child_layer_collection, index=self.index))
 
         # A collection might have objects
-        graph = SceneGraph(self.scene_graph.scene)
+        graph = SceneGraph(self.scene_graph.scene,
+                           mesh_cache=self.scene_graph.mesh_cache,
+                           source=self.scene_graph)
         for o in self.collection.objects:
-            graph.add_node(o)
+            self.index.add(graph.add_node(o))
 
         self.children.extend(graph.root.children)
@@ -56,7 +56,7 @@ class RamsesInspector():
 
         cmd = f'{str(program_full_path)} {program_args}'
 
-        log.debug(f'Running viewer. Command is: {cmd}\n')
+        log.debug('Running viewer. Command is: %s\n', cmd)
 
         self.viewer_process = subprocess.Popen(cmd, shell=True)
         if block:
@@ -0,0 +1,135 @@
+#  -------------------------------------------------------------------------
+#  Copyright (C) 2019 Daniel Werner Lima Souza de Almeida
+#                     dwlsalmeida at gmail dot com
+#  -------------------------------------------------------------------------
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#  -------------------------------------------------------------------------
+
+from __future__ import annotations # Annotations name RAMSES types without evaluating them
+from typing import List, Tuple
+from . import RamsesPython
+from . import debug_utils
+from .intermediary_representation import Node
+
+log = debug_utils.get_debug_logger()
+
+
+class RenderOrderOptimizer():
+    """Orders the meshes of a RenderGroup so the ones drawn with the same
+    effect, and within that the same geometry, come one after another,
+    sparing the GPU state changes in between.
+
+    Appearances are not taken into account, every mesh has its own. Every
+    RenderGroup is ordered, and counted, once, however many RenderPasses
+    render it."""
+
+    def __init__(self):
+        # IR mesh node -> (Effect, index array, vertex array) it is drawn with
+        self._states = {}
+
+        self.groups_sorted = 0
+        self.groups_kept = 0
+        self.effect_changes_before = 0
+        self.effect_changes_after = 0
+        self.geometry_changes_before = 0
+        self.geometry_changes_after = 0
+
+    def record(self,
+               ir_node: Node,
+               effect: RamsesPython.Effect,
+               indices: RamsesPython.Resource,
+               vertices: RamsesPython.Resource):
+        """Remembers the resources a mesh was translated with"""
+        self._states[ir_node] = (effect, indices, vertices)
+
+    def clear(self):
+        """Forgets the recorded meshes, counters are kept"""
+        self._states.clear()
+
+    def order(self, slots: List[Tuple[Node, object]], keep_order: bool = False) -> List[Tuple[Node, object]]:
+        """Returns the contents of a RenderGroup in the order to render them.
+        Meshes are sorted by effect, then by geometry, in the order each
+        effect and geometry is first used in the group so the result is
+        stable. Nested RenderGroups stay where they are.
+
+        Arguments:
+            slots {List[Tuple[Node, object]]} -- The contents of the group in \
+                traversal order. The IR node of a mesh, None for nested groups, \
+                along with the RAMSES object to add to the group
+
+        Keyword Arguments:
+            keep_order {bool} -- Only count the state changes, do not sort \
+                (default: {False})
+
+        Returns:
+            List[Tuple[Node, object]] -- The same slots, reordered
+        """
+
+        meshes = [slot for slot in slots if slot[0] is not None]
+        effect_changes, geometry_changes = self._count_state_changes(meshes)
+        self.effect_changes_before += effect_changes
+        self.geometry_changes_before += geometry_changes
+
+        if keep_order:
+            self.groups_kept += 1
+            self.effect_changes_after += effect_changes
+            self.geometry_changes_after += geometry_changes
+            return slots
+
+        effect_rank = {}
+        geometry_rank = {}
+        for ir_node, _ in meshes:
+            effect, indices, vertices = self._states[ir_node]
+            effect_rank.setdefault(id(effect), len(effect_rank))
+            geometry_rank.setdefault((id(indices), id(vertices)), len(geometry_rank))
+
+        def sort_key(slot):
+            effect, indices, vertices = self._states[slot[0]]
+            return effect_rank[id(effect)], geometry_rank[(id(indices), id(vertices))]
+
+        # sorted() is stable, meshes sharing all state keep their order
+        sorted_meshes = sorted(meshes, key=sort_key)
+        remaining = iter(sorted_meshes)
+        ordered = [slot if slot[0] is None else next(remaining) for slot in slots]
+
+        effect_changes, geometry_changes = self._count_state_changes(sorted_meshes)
+        self.effect_changes_after += effect_changes
+        self.geometry_changes_after += geometry_changes
+        self.groups_sorted += 1
+
+        return ordered
+
+    def _count_state_changes(self, meshes: List[Tuple[Node, object]]) -> Tuple[int, int]:
+        """Counts how often consecutive meshes switch effect and geometry"""
+        effect_changes = 0
+        geometry_changes = 0
+        previous = None
+
+        for ir_node, _ in meshes:
+            effect, indices, vertices = self._states[ir_node]
+
+            if previous:
+                effect_changes += previous[0] is not effect
+                geometry_changes += previous[1] is not indices or previous[2] is not vertices
+
+            previous = (effect, indices, vertices)
+
+        return effect_changes, geometry_changes
+
+    def summary(self) -> str:
+        """A one line report of the estimated state changes saved"""
+        effects_saved = self.effect_changes_before - self.effect_changes_after
+        geometry_saved = self.geometry_changes_before - self.geometry_changes_after
+
+        return (f'Render order: {self.groups_sorted} RenderGroups sorted, {self.groups_kept} kept as they were. '
+                + f'Effect changes: {self.effect_changes_before} -> {self.effect_changes_after} ({effects_saved} saved), '
+                + f'geometry changes: {self.geometry_changes_before} -> {self.geometry_changes_after} ({geometry_saved} saved)')
+
+    def log_statistics(self):
+        log.debug('Render order: %d RenderGroups sorted, %d kept as they were. '
+                  'Effect changes: %d -> %d, geometry changes: %d -> %d',
+                  self.groups_sorted, self.groups_kept,
+                  self.effect_changes_before, self.effect_changes_after,
+                  self.geometry_changes_before, self.geometry_changes_after)
@@ -0,0 +1,169 @@
+#  -------------------------------------------------------------------------
+#  Copyright (C) 2019 Daniel Werner Lima Souza de Almeida
+#                     dwlsalmeida at gmail dot com
+#  -------------------------------------------------------------------------
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#  -------------------------------------------------------------------------
+
+from __future__ import annotations # Annotations name RAMSES types without evaluating them
+import hashlib
+import numpy
+from . import RamsesPython
+from . import debug_utils
+from . import instrumentation
+from .intermediary_representation import MeshNode
+
+log = debug_utils.get_debug_logger()
+
+
+class ResourceCache():
+    """Keeps track of the RAMSES resources created for a scene, so meshes
+    sharing the same data also share the resources"""
+
+    def __init__(self, ramses_scene: RamsesPython.Scene):
+        self.ramses_scene = ramses_scene
+        # MeshData key -> (index array, vertex array)
+        self._geometry = {}
+        # Hash of the buffer contents -> index or vertex array
+        self._buffers = {}
+        # Hash of shader sources and vertex format -> Effect
+        self._effects = {}
+
+        self.geometry_hits = 0
+        self.geometry_misses = 0
+        self.buffer_hits = 0
+        self.buffer_misses = 0
+        self.buffer_bytes_saved = 0
+        self.effect_hits = 0
+        self.effect_misses = 0
+
+    def geometry_arrays(self, ir_node: MeshNode):
+        """Returns the RAMSES index and vertex arrays for the node, creating
+        them only for geometry that has not been seen yet. Nodes sharing a
+        mesh datablock are matched first, any other geometry is matched by
+        the contents of its buffers.
+
+        Arguments:
+            ir_node {MeshNode} -- The node whose geometry is needed
+
+        Returns:
+            Tuple[RamsesPython.Resource, RamsesPython.Resource] -- The index \
+                and vertex arrays
+        """
+        key = ir_node.mesh_data.key
+        arrays = self._geometry.get(key)
+
+        if arrays is None:
+            self.geometry_misses += 1
+            indices = self._buffer_resource(ir_node.get_index_array(),
+                                            self.ramses_scene.createIndexArray)
+            vertices = self._buffer_resource(ir_node.get_vertex_array(),
+                                             lambda values: self.ramses_scene.createVertexArray(3, values))
+            arrays = (indices, vertices)
+            self._geometry[key] = arrays
+        else:
+            self.geometry_hits += 1
+            log.debug('Reusing RAMSES arrays of mesh data %s for "%s"', key, ir_node.name)
+
+        return arrays
+
+    @staticmethod
+    def content_key(buffer: numpy.ndarray) -> str:
+        """Hashes the contents of a buffer, including its type and shape so
+        e.g. index and vertex data with the same bytes are told apart
+
+        Arguments:
+            buffer {numpy.ndarray} -- A packed index or vertex buffer
+
+        Returns:
+            str -- A digest identifying the buffer
+        """
+        digest = hashlib.sha256()
+        digest.update(f'{buffer.dtype.str}{buffer.shape}'.encode('utf-8'))
+        # Hashed in place, no copy is made for contiguous buffers
+        digest.update(numpy.ascontiguousarray(buffer).data)
+        return digest.hexdigest()
+
+    def _buffer_resource(self, buffer: numpy.ndarray, create):
+        key = self.content_key(buffer)
+        resource = self._buffers.get(key)
+
+        if resource is None:
+            self.buffer_misses += 1
+            resource = create(buffer.tolist())
+            self._buffers[key] = resource
+        else:
+            self.buffer_hits += 1
+            self.buffer_bytes_saved += buffer.nbytes
+            log.debug('Reusing RAMSES array with identical contents (%d bytes)', buffer.nbytes)
+
+        return resource
+
+    @staticmethod
+    def effect_key(vertex_shader: str, fragment_shader: str, vertexformat: dict) -> str:
+        """Hashes everything an Effect is made of
+
+        Arguments:
+            vertex_shader {str} -- GLSL source of the vertex shader
+            fragment_shader {str} -- GLSL source of the fragment shader
+            vertexformat {dict} -- Maps vertex attributes to their names in GLSL
+
+        Returns:
+            str -- A digest identifying the Effect
+        """
+        digest = hashlib.sha256()
+
+        for part in (vertex_shader, fragment_shader, repr(sorted(vertexformat.items()))):
+            digest.update(part.encode('utf-8'))
+            # Keeps e.g. ('ab', 'c') and ('a', 'bc') apart
+            digest.update(b'\0')
+
+        return digest.hexdigest()
+
+    def effect(self,
+               vertex_shader: str,
+               fragment_shader: str,
+               vertexformat: dict) -> RamsesPython.Effect:
+        """Returns an Effect for the shaders, creating it only if no other
+        mesh of the scene uses the same sources and vertex format.
+
+        Arguments:
+            vertex_shader {str} -- GLSL source of the vertex shader
+            fragment_shader {str} -- GLSL source of the fragment shader
+            vertexformat {dict} -- Maps vertex attributes to their names in GLSL
+
+        Returns:
+            RamsesPython.Effect -- The shared Effect
+        """
+        key = self.effect_key(vertex_shader, fragment_shader, vertexformat)
+        effect = self._effects.get(key)
+
+        if effect is None:
+            self.effect_misses += 1
+            with instrumentation.span('ResourceCache.createEffect', effect=key[:12]):
+                effect = self.ramses_scene.createEffect(vertex_shader, fragment_shader)
+            self._effects[key] = effect
+        else:
+            self.effect_hits += 1
+
+        return effect
+
+    def log_statistics(self):
+        """Writes how often resources were reused to the debug log"""
+
+        def rate(hits, misses):
+            total = hits + misses
+            return 100 * hits / total if total else 0
+
+        log.debug('Resource cache for scene "%s": '
+                  'effects: %d hits, %d misses (%.0f%% hit rate), '
+                  'geometry: %d hits, %d misses (%.0f%% hit rate), '
+                  'buffers: %d hits, %d misses (%.0f%% hit rate), '
+                  '%d bytes not stored again',
+                  self.ramses_scene,
+                  self.effect_hits, self.effect_misses, rate(self.effect_hits, self.effect_misses),
+                  self.geometry_hits, self.geometry_misses, rate(self.geometry_hits, self.geometry_misses),
+                  self.buffer_hits, self.buffer_misses, rate(self.buffer_hits, self.buffer_misses),
+                  self.buffer_bytes_saved)
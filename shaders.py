@@ -8,17 +8,209 @@
 #  file, You can obtain one at https://mozilla.org/MPL/2.0/.
 #  -------------------------------------------------------------------------
 
+import os
+import re
 import json
 import pathlib
+import functools
 from . import debug_utils
+from . import instrumentation
 from . import intermediary_representation
 log = debug_utils.get_debug_logger()
 
 
+def _stamp(paths) -> tuple:
+    """Identifies the state of files on disk, to tell when they change"""
+    stamp = []
+    for path in paths:
+        path = str(path)
+        try:
+            stat = os.stat(path)
+            stamp.append((path, (stat.st_mtime_ns, stat.st_size)))
+        except OSError:
+            # Gone, so never matches a stamp taken while it was there
+            stamp.append((path, None))
+    return tuple(stamp)
+
+
+class GLSLPreprocessor():
+    """Prepares GLSL sources for RAMSES: resolves #include directives, then
+    strips comments and redundant whitespace. Sources only differing in
+    formatting become identical, so their effects are shared, and less
+    text ends up in the .ramres file.
+
+    Included files are looked up in a single directory, usually the
+    shader directory, and each is included at most once per shader."""
+
+    _INCLUDE = re.compile(r'^[ \t]*#[ \t]*include[ \t]+"([^"]+)"[ \t]*$', re.MULTILINE)
+    _COMMENT = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+    # A single space along with the characters around it
+    _SPACE = re.compile(r'(?<=(.)) (?=(.))')
+    _WORD = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_')
+    # Characters that might form a single token with their neighbours, e.g. '-' '-' or '<' '='
+    _OPERATOR = frozenset('+-*/%<>=!&|^~?:.')
+
+    def __init__(self):
+        # Path -> (stamp, contents with comments stripped) of included files
+        self._files = {}
+
+    def process(self, source: str, include_dir: str = None):
+        """Resolves includes and minifies a GLSL source
+
+        Arguments:
+            source {str} -- The GLSL source
+
+        Keyword Arguments:
+            include_dir {str} -- Where to look up included files (default: {None})
+
+        Raises:
+            RuntimeError: Raised when an included file cannot be read or is \
+                outside of 'include_dir', or when including without 'include_dir'
+
+        Returns:
+            Tuple[str, List[str]] -- The processed source and the paths of \
+                every file included into it
+        """
+        included = []
+        source = self._resolve_includes(self._strip_comments(source), include_dir, included)
+        return self.minify(source), included
+
+    def _strip_comments(self, source: str) -> str:
+        # Line continuations go first, a comment might be continued
+        source = source.replace('\r\n', '\n').replace('\r', '\n').replace('\\\n', '')
+        # Block comments still separate tokens, e.g. 'float/**/x'
+        return self._COMMENT.sub(lambda match: ' ' if match.group(0).startswith('/*') else '', source)
+
+    def _resolve_includes(self, source: str, include_dir: str, included: list) -> str:
+        def include(match):
+            if not include_dir:
+                raise RuntimeError(f'Cannot resolve #include "{match.group(1)}" without a shader directory.')
+
+            root = os.path.abspath(include_dir)
+            path = os.path.normpath(os.path.join(root, match.group(1)))
+            if not self._is_within(path, root):
+                raise RuntimeError(f'Cannot read included GLSL file "{path}": outside of the shader directory {root}')
+            if path in included:
+                return ''
+            included.append(path)
+
+            return self._resolve_includes(self._read(path), include_dir, included)
+
+        return self._INCLUDE.sub(include, source)
+
+    @staticmethod
+    def _is_within(path: str, directory: str) -> bool:
+        try:
+            return os.path.commonpath([path, directory]) == directory
+        except ValueError:
+            # Different drives on Windows
+            return False
+
+    def _read(self, path: str) -> str:
+        stamp = _stamp([path])
+        cached = self._files.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+
+        try:
+            with open(path, 'r') as f:
+                contents = self._strip_comments(f.read())
+        except OSError as e:
+            raise RuntimeError(f'Cannot read included GLSL file "{path}": {e}')
+
+        self._files[path] = (stamp, contents)
+        log.debug('Read included GLSL from %s', path)
+        return contents
+
+    def minify(self, source: str) -> str:
+        """Drops empty lines and every space not needed to tell tokens
+        apart. Preprocessor directives keep single spaces, as e.g. a space
+        tells '#define F (x)' from '#define F(x)'"""
+        lines = []
+
+        for line in source.split('\n'):
+            line = ' '.join(line.split())
+            if not line:
+                continue
+
+            if not line.startswith('#'):
+                line = self._SPACE.sub(self._space, line)
+
+            lines.append(line)
+
+        return '\n'.join(lines) + '\n'
+
+    def _space(self, match) -> str:
+        before, after = match.group(1), match.group(2)
+        needed = (before in self._WORD and after in self._WORD) or \
+                 (before in self._OPERATOR and after in self._OPERATOR)
+        return ' ' if needed else ''
+
+
+@functools.lru_cache(maxsize=None)
+def _preprocessed_default_glsl(vertex_shader: str, fragment_shader: str):
+    """The default shaders never change, so they are only processed once"""
+    preprocessor = GLSLPreprocessor()
+    return preprocessor.process(vertex_shader)[0], preprocessor.process(fragment_shader)[0]
+
+
+class ShaderLibrary():
+    """Keeps the configs and GLSL sources read from shader directories, so
+    every directory and technique is only read once per export, however
+    many meshes use it. Entries are read again once any of their files or
+    the directory itself changes on disk.
+
+    Entries are shared, callers must not modify them"""
+
+    def __init__(self):
+        # (directory, technique) -> (file stamps, (config, vertex shader, fragment shader))
+        self._entries = {}
+        # Keeps included files around as well
+        self.preprocessor = GLSLPreprocessor()
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, shader_dir: str, technique: str, load):
+        """Returns the config and GLSL sources of a technique
+
+        Arguments:
+            shader_dir {str} -- The shader directory
+            technique {str} -- The technique in its config
+            load {callable} -- Reads the entry when it is not cached or out \
+                of date. Returns the entry along with the paths it was read from
+
+        Returns:
+            Tuple[dict, str, str] -- The config, vertex and fragment shaders
+        """
+        key = (os.path.abspath(shader_dir), technique)
+        cached = self._entries.get(key)
+
+        if cached and cached[0] == _stamp(path for path, _ in cached[0]):
+            self.hits += 1
+            return cached[1]
+
+        self.misses += 1
+        entry, paths = load()
+        # The directory changes too when files are added, removed or renamed
+        self._entries[key] = (_stamp([shader_dir] + list(paths)), entry)
+        log.debug('Read technique "%s" from shader directory %s', technique, shader_dir)
+        return entry
+
+    def clear(self):
+        self._entries.clear()
+        self.preprocessor = GLSLPreprocessor()
+
+    def log_statistics(self):
+        log.debug('Shader library: %d reads, %d cache hits', self.misses, self.hits)
+
+
 class ShaderUtils():
     """Deals with bridging shaders from Blender to RAMSES"""
 
-    def __init__(self):
+    def __init__(self, library: ShaderLibrary = None):
+        # Shared by every ShaderUtils of an export, see RamsesBlenderExporter
+        self.library = library if library else ShaderLibrary()
         self.shader_dir = ''
         self.current_node = None
         self.current_vert_shader = ''
@@ -33,11 +225,11 @@ class ShaderUtils():
         self.current_node = node
         self.shader_dir = shader_dir if shader_dir else ''
 
-        self.config = self._config_from_file() if self.shader_dir else self.get_default_config()
-
-        if shader_dir:
-            self.current_vert_shader, self.current_frag_shader = self._glsl_from_files(self.shader_dir, technique=technique)
+        if self.shader_dir:
+            self.config, self.current_vert_shader, self.current_frag_shader = \
+                self.library.get(self.shader_dir, technique, lambda: self._read_shader_dir(technique))
         else:
+            self.config = self.get_default_config()
             self.current_vert_shader, self.current_frag_shader = self._glsl_default()
 
         assert self.current_vert_shader
@@ -48,6 +240,7 @@ class ShaderUtils():
         self.current_node = None
         self.shader_dir = ''
 
+    @instrumentation.timed(describe=lambda self, node=None, technique='default': {'object': (node or self.current_node).name})
     def do_node(self, node=None, technique: str = 'default'):
         # NOTE: if we want neither the default nor custom GLSL but instead want to derive
         # i.e.: shaders from material nodes or something similar, this is the place to change it
@@ -65,12 +258,19 @@ class ShaderUtils():
             self.clear_current_node()
         return self.current_node
 
-    def _glsl_from_files(self, dir=None, technique: str = 'default'):
-
-        assert self._validate_config(self.config)
+    def _read_shader_dir(self, technique: str):
+        """Reads the config and GLSL sources of a technique from self.shader_dir,
+        for the shader library to cache"""
+        config = self._config_from_file()
+        self.config = config
+        vert_shader, frag_shader, included = self._glsl_from_files(self.shader_dir, technique=technique)
 
+        # Includes count too, a change to any of them changes the shaders
+        paths = [self._config_path(), *self._glsl_paths(self.shader_dir, technique), *included]
+        return (config, vert_shader, frag_shader), paths
 
-        scene_object_name = self.current_node.name
+    def _glsl_paths(self, dir=None, technique: str = 'default'):
+        """The vertex and fragment shader files of a technique"""
         vert_shader_name = self.config['techniques'][technique]['shaders']['vertex']
         frag_shader_name = self.config['techniques'][technique]['shaders']['fragment']
 
@@ -79,24 +279,31 @@ class ShaderUtils():
 
         dir = pathlib.Path(dir) if dir else pathlib.Path.cwd()
 
-        vert_path = pathlib.Path(dir/f'{vert_shader_name}.vert')
-        frag_path = pathlib.Path(dir/f'{frag_shader_name}.frag')
+        return pathlib.Path(dir/f'{vert_shader_name}.vert'), pathlib.Path(dir/f'{frag_shader_name}.frag')
+
+    def _glsl_from_files(self, dir=None, technique: str = 'default'):
+
+        assert self._validate_config(self.config)
+
+
+        scene_object_name = self.current_node.name
+        vert_path, frag_path = self._glsl_paths(dir, technique)
 
         if not vert_path and not frag_path:
             # Probably a mistake if both are missing
             raise RuntimeError(f"Tried reading GLSL from files but no shaders found for {scene_object_name}!\n")
 
         with open(vert_path, 'r') as f:
-            vert_shader = f.read()
+            vert_shader, vert_included = self.library.preprocessor.process(f.read(), include_dir=str(vert_path.parent))
             if vert_shader:
-                log.debug(f'Read GLSL from {vert_path} for {scene_object_name}. Contents are:\n{vert_shader}\n')
+                log.debug('Read GLSL from %s for %s. Contents are:\n%s\n', vert_path, scene_object_name, vert_shader)
 
         with open(frag_path, 'r') as f:
-            frag_shader = f.read()
+            frag_shader, frag_included = self.library.preprocessor.process(f.read(), include_dir=str(frag_path.parent))
             if frag_shader:
-                log.debug(f'Read GLSL from {frag_path} for {scene_object_name}. Contents are:\n{frag_shader}\n')
+                log.debug('Read GLSL from %s for %s. Contents are:\n%s\n', frag_path, scene_object_name, frag_shader)
 
-        return vert_shader, frag_shader
+        return vert_shader, frag_shader, vert_included + frag_included
 
     def _glsl_default(self) -> str:
 
@@ -127,21 +334,18 @@ class ShaderUtils():
 
                     """
 
-        return vertShader, fragShader
+        return _preprocessed_default_glsl(vertShader, fragShader)
 
     def _config_from_file(self):
         """Reads a config from config.txt in self.shader_dir"""
 
         if not self.shader_dir:
-            log.debug(f"Can't read shader config for {str(self.current_node)}: path has not been set")
+            log.debug("Can't read shader config for %s: path has not been set", self.current_node)
             return
 
         assert self.shader_dir # Sanity check if the above ever gets deleted
 
-        # TODO: consider improving this
-        config_paths = list(pathlib.Path(f'{self.shader_dir}').glob(pattern='*config.txt'))
-        assert len(config_paths) == 1 # NOTE: should we allow more than one config per node?
-        config_path = config_paths[0]
+        config_path = self._config_path()
 
         config_str = ''
         with open(config_path, 'r') as f:
@@ -153,6 +357,12 @@ class ShaderUtils():
         self._validate_config(loaded_dict)
         return loaded_dict
 
+    def _config_path(self) -> pathlib.Path:
+        # TODO: consider improving this
+        config_paths = list(pathlib.Path(f'{self.shader_dir}').glob(pattern='*config.txt'))
+        assert len(config_paths) == 1 # NOTE: should we allow more than one config per node?
+        return config_paths[0]
+
     def _validate_config(self, config: dict, valid_config: dict = None, die: bool = True) -> bool:
         """Validates a config against 'valid_config' in a recursive manner, failing if their keys differ.
 
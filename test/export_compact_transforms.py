@@ -0,0 +1,62 @@
+#  -------------------------------------------------------------------------
+#  Copyright (C) 2019 Daniel Werner Lima Souza de Almeida
+#                     dwlsalmeida@gmail.com
+#  -------------------------------------------------------------------------
+#  This Source Code Form is subject to the terms of the Mozilla Public
+#  License, v. 2.0. If a copy of the MPL was not distributed with this
+#  file, You can obtain one at https://mozilla.org/MPL/2.0/.
+#  -------------------------------------------------------------------------
+
+import unittest
+import bpy
+import ramses_export.RamsesPython
+
+from ramses_export.test.exporter_test_base import ExporterTestBase
+from ramses_export.exporter import RamsesBlenderExporter
+
+
+class TestExportCompactTransforms(ExporterTestBase, unittest.TestCase):
+    """Runs on any test scene. The screenshot is compared against the one
+    of the regular export, see run_all_tests.py"""
+
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        ExporterTestBase.__init__(self)
+
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_compact_transforms_match_regular_transforms(self):
+        mesh_names = [o.name_full for o in bpy.context.scene.objects if o.type == 'MESH']
+
+        # Kept in memory only, the output files belong to the compact export
+        reference = RamsesBlenderExporter(bpy.data.scenes)
+        reference.extract_from_blender_scene()
+        reference.build_from_extracted_representations()
+        reference_scene = reference.get_exportable_scenes()[0].ramses_scene
+
+        for exportable_scene in self.get_exportable_scenes_for_test(compact_transforms=True):
+            self.assertTrue(exportable_scene.is_valid())
+
+            for name in mesh_names:
+                expected = ramses_export.RamsesPython.toNode(reference_scene.findObjectByName(name)).getModelMatrix()
+                actual = ramses_export.RamsesPython.toNode(exportable_scene.ramses_scene.findObjectByName(name)).getModelMatrix()
+
+                assert len(expected) == 16
+                assert len(actual) == 16
+
+                for index, (expected_value, actual_value) in enumerate(zip(expected, actual)):
+                    self.assertAlmostEqual(expected_value, actual_value, places=5, msg=f'{name} on index {index}')
+
+if __name__ == '__main__':
+    suite_1 = unittest.defaultTestLoader.\
+            loadTestsFromTestCase(TestExportCompactTransforms)
+
+    all_tests = unittest.TestSuite([suite_1])
+
+    success = unittest.TextTestRunner().run(all_tests).wasSuccessful()
+    if not success:
+        raise Exception('Test "compact transforms" failed')
@@ -57,64 +57,17 @@ class ExportCubeCustomGLSLTest(ExporterTestBase, unittest.TestCase):
 
             default_vertex_shader, default_fragment_shader = exportable_scene.scene_representation.shader_utils._glsl_default()
 
-            self.assertNotEqual(cube_white_ir.vertex_shader, default_vertex_shader)
-            self.assertNotEqual(cube_white_ir.fragment_shader, default_fragment_shader)
-
-            custom_vertex_shader_red = """#version 300 es
-
-in vec3 a_position;
-uniform highp mat4 u_ModelMatrix;
-uniform highp mat4 u_ViewMatrix;
-uniform highp mat4 u_ProjectionMatrix;
-
-void main()
-{
-\tvec3 new_pos = a_position;
-
-\tnew_pos.x += 2.0f;
-\tnew_pos.y += 2.0f;
-\tnew_pos.z += 2.0f;
-
-\t
-\tgl_Position = u_ProjectionMatrix * u_ViewMatrix * u_ModelMatrix * vec4(new_pos.xyz, 1.0);
-}
-"""
-            custom_vertex_shader_default = """#version 300 es
-
-in vec3 a_position;
-uniform highp mat4 u_ModelMatrix;
-uniform highp mat4 u_ViewMatrix;
-uniform highp mat4 u_ProjectionMatrix;
-
-void main()
-{
-\tgl_Position = u_ProjectionMatrix * u_ViewMatrix * u_ModelMatrix * vec4(a_position.xyz, 1.0);
-}
-
-"""
-            custom_fragment_shader_red = """#version 300 es
-
-precision mediump float;
-
-out vec4 FragColor;
-
-void main(void)
-{
-\tFragColor = vec4(1.0, 0.0, 0.0, 1.0);
-}
-
-"""
-            custom_fragment_shader_default = """#version 300 es
-
-precision mediump float;
-
-out vec4 FragColor;
-
-void main(void)
-{
-\tFragColor = vec4(1.0, 1.0, 1.0, 1.0);
-}
-"""
+            # Library shaders are normalized like the default ones, so these only differed in whitespace
+            self.assertEqual(cube_white_ir.vertex_shader, default_vertex_shader)
+            self.assertEqual(cube_white_ir.fragment_shader, default_fragment_shader)
+
+            custom_vertex_shader_red = "#version 300 es\nin vec3 a_position;\nuniform highp mat4 u_ModelMatrix;\nuniform highp mat4 u_ViewMatrix;\nuniform highp mat4 u_ProjectionMatrix;\n" \
+                "void main()\n{\nvec3 new_pos=a_position;\nnew_pos.x+=2.0f;\nnew_pos.y+=2.0f;\nnew_pos.z+=2.0f;\n" \
+                "gl_Position=u_ProjectionMatrix*u_ViewMatrix*u_ModelMatrix*vec4(new_pos.xyz,1.0);\n}\n"
+            custom_vertex_shader_default = "#version 300 es\nin vec3 a_position;\nuniform highp mat4 u_ModelMatrix;\nuniform highp mat4 u_ViewMatrix;\nuniform highp mat4 u_ProjectionMatrix;\n" \
+                "void main()\n{\ngl_Position=u_ProjectionMatrix*u_ViewMatrix*u_ModelMatrix*vec4(a_position.xyz,1.0);\n}\n"
+            custom_fragment_shader_red = "#version 300 es\nprecision mediump float;\nout vec4 FragColor;\nvoid main(void)\n{\nFragColor=vec4(1.0,0.0,0.0,1.0);\n}\n"
+            custom_fragment_shader_default = "#version 300 es\nprecision mediump float;\nout vec4 FragColor;\nvoid main(void)\n{\nFragColor=vec4(1.0,1.0,1.0,1.0);\n}\n"
             # Using custom shaders that happen to be equal to the default ones
             self.assertEqual(cube_white_ir.vertex_shader, custom_vertex_shader_default, msg="GLSL differs between node and file")
             self.assertEqual(cube_white_ir.fragment_shader, custom_fragment_shader_default, msg="GLSL differs between node and file")
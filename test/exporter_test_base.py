@@ -14,7 +14,9 @@ import shutil
 import pathlib
 
 from ramses_export import debug_utils
+from ramses_export import instrumentation
 from ramses_export.exporter import RamsesBlenderExporter
+from ramses_export.exportable_scene import ExportableScene
 
 class AdaptedArgParser(argparse.ArgumentParser):
     """ adapted argparser that prints help on error    """
@@ -35,6 +37,8 @@ class ExporterTestBase():
         parser.add_argument("-p", "--platform", required=True, default=None, help="The platform to use for the renderer, such as 'X11-EGL-ES-3-0, WAYLAND-SHELL-EGL-ES-3-0, etc.")
         parser.add_argument("-a", "--addon-path", required=True, default=None, help='The install directory for the addon, e.g. "~/.config/blender/2.80/scripts/addons/ramses_export" or similar')
         parser.add_argument("-g", "--generate-expected-screenshots", required=False, default=False, action='store_true', help='Whether to copy the generated screenshots to "expected_results/"')
+        parser.add_argument("-t", "--trace", required=False, default=False, action='store_true', help='Whether to write a Chrome trace of the export to "export_trace.json" in the working directory')
+        parser.add_argument("--profile", required=False, default=False, action='store_true', help='Whether to profile the export with cProfile and tracemalloc, writing the reports to the working directory')
         index_of_double_dash = sys.argv.index('--')
         args_for_test_only = sys.argv[index_of_double_dash + 1:] if index_of_double_dash != -1 else []
         args = parser.parse_args(args_for_test_only)
@@ -42,6 +46,8 @@ class ExporterTestBase():
         self.platform = args.platform.lower()
         self.addon_path = args.addon_path
         self.generate_expected_screenshots = args.generate_expected_screenshots
+        self.trace = args.trace
+        self.profile = args.profile
 
         debug_utils.setup_logging(os.path.join(self.working_dir, 'debug.txt'))
 
@@ -56,7 +62,15 @@ class ExporterTestBase():
                                        platform: str = '',
                                        generate_expected_screenshots: bool = False,
                                        custom_params=None,
-                                       evaluate: bool = False):
+                                       evaluate: bool = False,
+                                       streaming: bool = False,
+                                       compact_transforms: bool = False,
+                                       validation_level: str = ExportableScene.VALIDATION_FULL,
+                                       parallel: bool = False,
+                                       optimize_render_order: bool = False,
+                                       collect_budget: bool = False,
+                                       trace: bool = False,
+                                       profile: bool = False):
 
         # Make configurable, but otherwise get them from CLI
         if not output_dir:
@@ -86,25 +100,43 @@ class ExporterTestBase():
         if generate_expected_screenshots:
             assert take_screenshot
 
-        exporter = RamsesBlenderExporter(bpy.data.scenes)
-        exporter.extract_from_blender_scene(custom_params=custom_params, evaluate=evaluate)
-        exporter.build_from_extracted_representations()
+        if not trace:
+            trace = self.trace
 
-        if len(exporter.get_exportable_scenes()) != num_scenes:
-            raise AssertionError(f'Expected {num_scenes} scenes, found {len(exporter.get_exportable_scenes())}')
+        if not profile:
+            profile = self.profile
 
-        exportable_scenes = exporter.get_exportable_scenes()
+        # Only the export itself is traced and profiled, not the viewer
+        timings = instrumentation.TimingRecorder(trace=True) if trace else None
+        profiler = instrumentation.ExportProfiler() if profile else None
 
-        for index, exportable_scene in enumerate(exportable_scenes):
-            exportable_scene.set_output_dir(output_dir)
+        with instrumentation.activate(timings, profiler):
+            exporter = RamsesBlenderExporter(bpy.data.scenes,
+                                             streaming=streaming,
+                                             compact_transforms=compact_transforms,
+                                             validation_level=validation_level,
+                                             parallel=parallel,
+                                             optimize_render_order=optimize_render_order,
+                                             collect_budget=collect_budget)
+            exporter.extract_from_blender_scene(custom_params=custom_params, evaluate=evaluate)
+            exporter.build_from_extracted_representations()
+
+            if len(exporter.get_exportable_scenes()) != num_scenes:
+                raise AssertionError(f'Expected {num_scenes} scenes, found {len(exporter.get_exportable_scenes())}')
+
+            exportable_scenes = exporter.get_exportable_scenes()
+
+            for exportable_scene in exportable_scenes:
+                exportable_scene.set_output_dir(output_dir)
 
-            if not exportable_scene.is_valid():
-                validation_report = exportable_scene.get_validation_report()
-                raise AssertionError(validation_report)
+                if not exportable_scene.is_valid():
+                    validation_report = exportable_scene.get_validation_report()
+                    raise AssertionError(validation_report)
 
-            if save:
-                exportable_scene.save()
+                if save:
+                    exportable_scene.save()
 
+        for index, exportable_scene in enumerate(exportable_scenes):
             if to_text:
                 with open(os.path.join(self.working_dir, f'scene_{index}.txt'), 'w') as file:
                     file.write(exportable_scene.ramses_scene.toText())
@@ -162,4 +194,10 @@ class ExporterTestBase():
 
                 viewer_process.terminate()
 
+        if timings:
+            timings.save_trace(os.path.join(self.working_dir, 'export_trace.json'))
+
+        if profiler:
+            profiler.save(self.working_dir)
+
         return exportable_scenes
@@ -67,6 +67,8 @@ def main():
     parser.add_argument("-p", "--platform", required=True, default=None, help="The platform to use for the renderer, such as 'X11-EGL-ES-3-0, WAYLAND-SHELL-EGL-ES-3-0, etc.")
     parser.add_argument("-a", "--addon-path", required=True, default=None, help='The install directory for the addon, e.g. "~/.config/blender/2.80/scripts/addons/ramses_export" or similar')
     parser.add_argument("-g", "--generate-expected-screenshots", required=False, default=False, action='store_true', help='Whether to copy the generated screenshots to "expected_results/"')
+    parser.add_argument("-t", "--trace", required=False, default=False, action='store_true', help='Whether to write a Chrome trace of every export to "export_trace.json" in the test results')
+    parser.add_argument("--profile", required=False, default=False, action='store_true', help='Whether to profile every export with cProfile and tracemalloc, writing the reports to the test results')
 
     args = parser.parse_args()
     if not os.path.exists(args.blender_binary):
@@ -241,6 +243,62 @@ def main():
                 'expected_image': os.path.join(current_path, 'expected_results/export_multiple_layers_and_collections_all_enabled_one_collection_excluded.png'),
                 'expected_output_files': 5,
             },
+        'export_cube_compact_transforms' :
+            {
+                'script'        : os.path.join(current_path, 'export_compact_transforms.py'),
+                'test_scene'    : os.path.join(current_path, 'test_scenes/cube.blend'),
+                # Must look exactly like the regular export
+                'expected_image': os.path.join(current_path, 'expected_results/export_cube.png'),
+                'expected_output_files': 5,
+            },
+        'export_translated1X2Y3Z_cube_compact_transforms' :
+            {
+                'script'        : os.path.join(current_path, 'export_compact_transforms.py'),
+                'test_scene'    : os.path.join(current_path, 'test_scenes/cube_translated1X2Y3Z.blend'),
+                # Must look exactly like the regular export
+                'expected_image': os.path.join(current_path, 'expected_results/export_translated1X2Y3Z_cube.png'),
+                'expected_output_files': 5,
+            },
+        'export_cube_scaledXYZ_compact_transforms' :
+            {
+                'script'        : os.path.join(current_path, 'export_compact_transforms.py'),
+                'test_scene'    : os.path.join(current_path, 'test_scenes/cube_scaledXYZ_2.blend'),
+                # Must look exactly like the regular export
+                'expected_image': os.path.join(current_path, 'expected_results/export_cube_scaledXYZ.png'),
+                'expected_output_files': 5,
+            },
+        'export_rotatedY45_cube_compact_transforms' :
+            {
+                'script'        : os.path.join(current_path, 'export_compact_transforms.py'),
+                'test_scene'    : os.path.join(current_path, 'test_scenes/cube_rotatedY45.blend'),
+                # Must look exactly like the regular export
+                'expected_image': os.path.join(current_path, 'expected_results/export_rotatedY45_cube.png'),
+                'expected_output_files': 5,
+            },
+        'export_rotatedX30Y45Z60_cube_compact_transforms' :
+            {
+                'script'        : os.path.join(current_path, 'export_compact_transforms.py'),
+                'test_scene'    : os.path.join(current_path, 'test_scenes/cube_rotated_X30Y45Z60.blend'),
+                # Must look exactly like the regular export
+                'expected_image': os.path.join(current_path, 'expected_results/export_rotatedX30Y45Z60_cube.png'),
+                'expected_output_files': 5,
+            },
+        'export_rotatedXZY_cube_compact_transforms' :
+            {
+                'script'        : os.path.join(current_path, 'export_compact_transforms.py'),
+                'test_scene'    : os.path.join(current_path, 'test_scenes/cube_rotated_XZY.blend'),
+                # Must look exactly like the regular export
+                'expected_image': os.path.join(current_path, 'expected_results/export_rotatedXZY_cube.png'),
+                'expected_output_files': 5,
+            },
+        'export_multiple_layers_and_collections_all_enabled_compact_transforms' :
+            {
+                'script'        : os.path.join(current_path, 'export_compact_transforms.py'),
+                'test_scene'    : os.path.join(current_path, 'test_scenes/layers_all_enabled.blend'),
+                # Must look exactly like the regular export
+                'expected_image': os.path.join(current_path, 'expected_results/export_multiple_layers_and_collections_all_enabled.png'),
+                'expected_output_files': 5,
+            },
 
     }
 
@@ -272,6 +330,12 @@ def main():
             # NOTE: Should append if new boolean flags are added
             test_args.append('--generate-expected-screenshots') # Whether to copy screenshots into 'expected_results/'
 
+        if args.trace:
+            test_args.append('--trace') # Whether to write a Chrome trace of the export
+
+        if args.profile:
+            test_args.append('--profile') # Whether to profile the export
+
         p = subprocess.Popen(test_args, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=test_results)
         out, err = p.communicate()
 
@@ -286,7 +350,9 @@ def main():
             test_failed = True
             print(f'Test {test} returned code {p.returncode}!')
 
-        output_files = os.listdir(test_result_dir)
+        # Traces and profiles are optional, they do not count as output
+        optional_output_files = ['export_trace.json', 'export.prof', 'export_profile.txt', 'export_allocations.txt']
+        output_files = [f for f in os.listdir(test_result_dir) if f not in optional_output_files]
         expected_output_files = tests[test]['expected_output_files']
         output_files_match_expectation = (len(output_files) == expected_output_files)
         if not output_files_match_expectation:
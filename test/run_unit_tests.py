@@ -22,13 +22,43 @@ def run():
             loadTestsFromTestCase(test_intermediary_representation.TestVectorUnpack)
     suite_2 = unittest.defaultTestLoader.\
             loadTestsFromTestCase(test_intermediary_representation.TestFind)
+    suite_4 = unittest.defaultTestLoader.\
+            loadTestsFromTestCase(test_intermediary_representation.TestSceneGraphIndex)
+    suite_5 = unittest.defaultTestLoader.\
+            loadTestsFromTestCase(test_intermediary_representation.TestMeshDataCache)
+    suite_6 = unittest.defaultTestLoader.\
+            loadTestsFromTestCase(test_intermediary_representation.TestViewLayerInstancing)
+    suite_7 = unittest.defaultTestLoader.\
+            loadTestsFromTestCase(test_intermediary_representation.TestBufferExtraction)
+    suite_8 = unittest.defaultTestLoader.\
+            loadTestsFromTestCase(test_intermediary_representation.TestDeepHierarchy)
 
     suite_3 = unittest.defaultTestLoader.\
             loadTestsFromTestCase(test_RamsesBlenderExporter.TestRamsesBlenderExporter)
+    suite_9 = unittest.defaultTestLoader.\
+            loadTestsFromTestCase(test_RamsesBlenderExporter.TestRenderOrderOptimizer)
+    suite_10 = unittest.defaultTestLoader.\
+            loadTestsFromTestCase(test_RamsesBlenderExporter.TestTimingRecorder)
+    suite_11 = unittest.defaultTestLoader.\
+            loadTestsFromTestCase(test_RamsesBlenderExporter.TestBudgetLimits)
+    suite_12 = unittest.defaultTestLoader.\
+            loadTestsFromTestCase(test_intermediary_representation.TestShaderLibrary)
+    suite_13 = unittest.defaultTestLoader.\
+            loadTestsFromTestCase(test_intermediary_representation.TestGLSLPreprocessor)
 
     all_tests = unittest.TestSuite([suite_1,
                                     suite_2,
-                                    suite_3])
+                                    suite_3,
+                                    suite_4,
+                                    suite_5,
+                                    suite_6,
+                                    suite_7,
+                                    suite_8,
+                                    suite_9,
+                                    suite_10,
+                                    suite_11,
+                                    suite_12,
+                                    suite_13])
 
     success = unittest.TextTestRunner().run(all_tests).wasSuccessful()
     if not success:
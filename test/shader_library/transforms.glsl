@@ -0,0 +1,4 @@
+// Matrices RAMSES sets for every mesh, shared by the vertex shaders
+uniform highp mat4 u_ModelMatrix;
+uniform highp mat4 u_ViewMatrix;
+uniform highp mat4 u_ProjectionMatrix;
@@ -1,9 +1,7 @@
 #version 300 es
 
 in vec3 a_position;
-uniform highp mat4 u_ModelMatrix;
-uniform highp mat4 u_ViewMatrix;
-uniform highp mat4 u_ProjectionMatrix;
+#include "transforms.glsl"
 
 void main()
 {
@@ -10,10 +10,20 @@
 
 
 import unittest
+import unittest.mock
 import bpy
 import os
+import tempfile
+import json
+import mathutils
 import ramses_export.debug_utils
 import ramses_export.exporter
+import ramses_export.intermediary_representation
+import ramses_export.resource_cache
+import ramses_export.render_order
+import ramses_export.instrumentation
+import ramses_export.budget
+from ramses_export.exportable_scene import ExportableScene
 import ramses_export.ramses_inspector
 import ramses_export.RamsesPython
 
@@ -61,4 +71,560 @@ class TestRamsesBlenderExporter(ExporterTestBase, unittest.TestCase):
                 validation_report = exportable_scene.get_validation_report()
                 raise RuntimeError(validation_report)
 
-            inspector.close_viewer()
\ No newline at end of file
+            inspector.close_viewer()
+
+    def test_streaming_matches_regular_export(self):
+        regular = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes)
+        regular.extract_from_blender_scene()
+        regular.build_from_extracted_representations()
+
+        streaming = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes, streaming=True)
+        streaming.extract_from_blender_scene()
+        streaming.build_from_extracted_representations()
+
+        for expected, exportable_scene in zip(regular.get_exportable_scenes(),
+                                              streaming.get_exportable_scenes()):
+            self.assertTrue(exportable_scene.is_valid())
+            self.assertEqual(expected.to_text(), exportable_scene.to_text())
+
+            # Nothing is kept around once the layers are translated
+            representation = exportable_scene.scene_representation
+            self.assertFalse(representation.layers)
+            self.assertEqual(representation.graph.root.children, [])
+            self.assertEqual(len(representation.mesh_cache), 0)
+            self.assertEqual(exportable_scene.ramses_objects, {})
+            self.assertEqual(representation._layer_cameras, {})
+
+    def test_every_pass_renders_every_layer(self):
+        scene = bpy.context.scene
+        second_layer = scene.view_layers.new('Second layer')
+        self.addCleanup(scene.view_layers.remove, second_layer)
+        layers = [layer.name for layer in scene.view_layers if layer.use]
+        texts = {}
+
+        for streaming in (False, True):
+            exporter = ramses_export.exporter.RamsesBlenderExporter([scene], streaming=streaming)
+            with unittest.mock.patch.object(exporter, 'do_passes', wraps=exporter.do_passes) as do_passes:
+                exporter.extract_from_blender_scene()
+                exporter.build_from_extracted_representations()
+
+            exportable_scene = exporter.get_exportable_scenes()[0]
+            self.assertTrue(exportable_scene.is_valid())
+            texts[streaming] = exportable_scene.to_text()
+
+            # One pass per layer, all of them sharing one group per layer
+            _, cameras, groups = do_passes.call_args[0]
+            self.assertEqual([name for name, _ in cameras], layers)
+            self.assertEqual(len(groups), len(layers))
+            self.assertEqual(len(set(map(id, groups))), len(layers))
+            for name in layers:
+                self.assertIsNotNone(exportable_scene.ramses_scene.findObjectByName(f'RenderPass for {name}'))
+
+        self.assertEqual(texts[False], texts[True])
+
+
+    def test_compact_transforms_use_one_node_per_rotated_axis(self):
+        exporter = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes, compact_transforms=True)
+        ramses_scene = exporter.ramses.createScene('Compact transforms')
+
+        parent = ramses_export.intermediary_representation.Node(name='Parent')
+        node = ramses_export.intermediary_representation.Node(name='Child')
+        parent.add_child(node)
+
+        # Identity transforms are skipped entirely
+        self.assertEqual(exporter._resolve_compact_transforms_for_node(ramses_scene, node), [])
+
+        node.location = mathutils.Vector((1.0, 2.0, 3.0))
+        node.scale = mathutils.Vector((2.0, 2.0, 2.0))
+        node.rotation = mathutils.Euler((0.5, 0.0, 0.0), 'XYZ')
+        self.assertEqual(len(exporter._resolve_compact_transforms_for_node(ramses_scene, node)), 1)
+
+        node.rotation = mathutils.Euler((0.5, 0.5, 0.5), 'XZY')
+        self.assertEqual(len(exporter._resolve_compact_transforms_for_node(ramses_scene, node)), 3)
+
+
+    def test_meshes_with_the_same_shaders_share_one_effect(self):
+        bpy.ops.mesh.primitive_cube_add(location=(3.0, 0.0, 0.0))
+        first = bpy.context.active_object
+        bpy.ops.mesh.primitive_cube_add(location=(-3.0, 0.0, 0.0))
+        second = bpy.context.active_object
+
+        exporter = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes)
+        exporter.extract_from_blender_scene()
+        exporter.build_from_extracted_representations()
+
+        for exportable_scene in exporter.get_exportable_scenes():
+            self.assertTrue(exportable_scene.is_valid())
+            self.assertEqual(exportable_scene.resources.effect_misses, 1)
+            self.assertGreaterEqual(exportable_scene.resources.effect_hits, 1)
+
+        bpy.data.objects.remove(first, do_unlink=True)
+        bpy.data.objects.remove(second, do_unlink=True)
+
+
+    def test_identical_geometry_shares_arrays(self):
+        # Two datablocks, same contents
+        bpy.ops.mesh.primitive_cube_add(location=(3.0, 0.0, 0.0))
+        first = bpy.context.active_object
+        bpy.ops.mesh.primitive_cube_add(location=(-3.0, 0.0, 0.0))
+        second = bpy.context.active_object
+        self.assertNotEqual(first.data, second.data)
+
+        exporter = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes)
+        resources = ramses_export.resource_cache.ResourceCache(exporter.ramses.createScene('Deduplication'))
+        first_node = ramses_export.intermediary_representation.MeshNode(first)
+        second_node = ramses_export.intermediary_representation.MeshNode(second)
+
+        first_indices, first_vertices = resources.geometry_arrays(first_node)
+        second_indices, second_vertices = resources.geometry_arrays(second_node)
+
+        self.assertIs(first_indices, second_indices)
+        self.assertIs(first_vertices, second_vertices)
+        self.assertEqual(resources.buffer_misses, 2)
+        self.assertEqual(resources.buffer_hits, 2)
+
+        first_node.teardown()
+        second_node.teardown()
+        bpy.data.objects.remove(first, do_unlink=True)
+        bpy.data.objects.remove(second, do_unlink=True)
+
+
+    def test_validation_report_is_cached_until_the_scene_is_accessed(self):
+        exporter = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes)
+        exporter.extract_from_blender_scene()
+        exporter.build_from_extracted_representations()
+
+        for exportable_scene in exporter.get_exportable_scenes():
+            report = exportable_scene.get_validation_report()
+            self.assertTrue(exportable_scene.is_valid())
+            self.assertIs(exportable_scene.get_validation_report(), report)
+
+            exportable_scene.ramses_scene # Might be modified by the caller
+            self.assertIsNone(exportable_scene._validation_report)
+
+    def test_validation_levels(self):
+        for level in (ExportableScene.VALIDATION_OFF, ExportableScene.VALIDATION_ERRORS):
+            exporter = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes, validation_level=level)
+            exporter.extract_from_blender_scene()
+            exporter.build_from_extracted_representations()
+
+            for exportable_scene in exporter.get_exportable_scenes():
+                self.assertTrue(exportable_scene.is_valid())
+                self.assertNotIn('WARNING', exportable_scene.get_validation_report())
+
+                if level == ExportableScene.VALIDATION_OFF:
+                    self.assertEqual(exportable_scene.get_validation_report(), '')
+
+    def test_parallel_export_matches_sequential_export(self):
+        camera = bpy.data.objects['Camera']
+        second_scene = bpy.data.scenes.new('Second scene')
+        second_scene.collection.objects.link(camera)
+        second_scene.camera = camera
+        cube = bpy.data.objects.new('Cube in second scene', bpy.data.meshes.new_from_object(bpy.data.objects['Cube']))
+        second_scene.collection.objects.link(cube)
+        self.addCleanup(bpy.data.scenes.remove, second_scene)
+        self.addCleanup(bpy.data.objects.remove, cube, do_unlink=True)
+
+        sequential = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes)
+        sequential.extract_from_blender_scene()
+        sequential.build_from_extracted_representations()
+
+        # The working directory must only hold the files run_all_tests.py expects
+        output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(output_dir.cleanup)
+
+        parallel = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes, parallel=True, max_workers=2)
+        parallel.extract_from_blender_scene()
+        parallel.build_from_extracted_representations(output_dir=output_dir.name)
+
+        self.assertEqual(len(parallel.get_exportable_scenes()), len(bpy.data.scenes))
+
+        for scene, expected, exportable_scene in zip(bpy.data.scenes,
+                                                     sequential.get_exportable_scenes(),
+                                                     parallel.get_exportable_scenes()):
+            self.assertIs(exportable_scene.blender_scene, scene)
+            self.assertTrue(exportable_scene.is_valid())
+            self.assertEqual(expected.to_text(), exportable_scene.to_text())
+            self.assertTrue(os.path.exists(os.path.join(output_dir.name, f'{scene.name}.ramses')))
+
+    def test_parallel_export_cannot_stream(self):
+        with self.assertRaises(RuntimeError):
+            ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes, streaming=True, parallel=True)
+
+    def test_render_order_keeps_collections_that_ask_for_it(self):
+        scene = bpy.context.scene
+        for collection in scene.collection.children:
+            collection['ramses_keep_render_order'] = True
+            self.addCleanup(collection.pop, 'ramses_keep_render_order')
+
+        exporter = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes, optimize_render_order=True)
+        exporter.extract_from_blender_scene()
+        exporter.build_from_extracted_representations()
+
+        for exportable_scene in exporter.get_exportable_scenes():
+            self.assertTrue(exportable_scene.is_valid())
+
+            render_order = exportable_scene.render_order
+            if exportable_scene.blender_scene == scene and scene.collection.children:
+                self.assertGreaterEqual(render_order.groups_kept, 1)
+            self.assertEqual(render_order.effect_changes_after, render_order.effect_changes_before)
+            self.assertIn('Effect changes', render_order.summary())
+
+    def test_render_order_counts_every_group_once(self):
+        scene = bpy.context.scene
+
+        def export():
+            exporter = ramses_export.exporter.RamsesBlenderExporter([scene], optimize_render_order=True)
+            exporter.extract_from_blender_scene()
+            exporter.build_from_extracted_representations()
+            render_order = exporter.get_exportable_scenes()[0].render_order
+            return (render_order.groups_sorted + render_order.groups_kept,
+                    render_order.effect_changes_before,
+                    render_order.geometry_changes_before)
+
+        def used_layers():
+            return len([layer for layer in scene.view_layers if layer.use])
+
+        layers = used_layers()
+        counts = export()
+
+        second_layer = scene.view_layers.new('Second layer')
+        self.addCleanup(scene.view_layers.remove, second_layer)
+
+        # The groups of a layer are ordered once, however many passes render them
+        self.assertGreater(counts[0], 0)
+        self.assertEqual(export(), tuple(count // layers * used_layers() for count in counts))
+
+    def test_budget_counts_meshes_per_collection_and_layer(self):
+        scene = bpy.context.scene
+        meshes = [o for o in scene.objects if o.type == 'MESH']
+        budgets = {}
+
+        for streaming in (False, True):
+            exportable_scenes = self.get_exportable_scenes_for_test(save=False,
+                                                                    to_text=False,
+                                                                    take_screenshot=False,
+                                                                    streaming=streaming,
+                                                                    collect_budget=True)
+            exportable_scene = next(s for s in exportable_scenes if s.blender_scene == scene)
+            budgets[streaming] = exportable_scene.budget.to_dict()
+
+        budget = budgets[False]
+        self.assertEqual(budget, budgets[True])
+
+        totals = budget['totals']
+        self.assertEqual(totals['draw_calls'], len(meshes))
+        self.assertEqual(totals['triangles'], sum(mesh['triangles'] for mesh in budget['meshes']))
+        # Nodes for the camera and light too
+        self.assertGreater(totals['nodes'], len(meshes))
+        self.assertGreater(totals['resource_bytes'], 0)
+
+        for layer in budget['view_layers']:
+            self.assertLessEqual(layer['draw_calls'], totals['draw_calls'])
+            if layer['draw_calls']:
+                # One group for the layer, one for each collection with meshes
+                self.assertEqual(layer['render_groups'],
+                                 1 + sum(1 for c in budget['collections']
+                                         if c['view_layer'] == layer['name'] and c['draw_calls']))
+
+        for mesh in budget['meshes']:
+            self.assertEqual(mesh['index_bytes'], mesh['triangles'] * 3 * ramses_export.budget.BYTES_PER_INDEX)
+            self.assertEqual(mesh['vertex_bytes'], mesh['vertices'] * ramses_export.budget.BYTES_PER_VERTEX)
+
+        # The working directory must only hold the files run_all_tests.py expects
+        with tempfile.TemporaryDirectory() as output_dir:
+            path = os.path.join(output_dir, 'budget.json')
+            exportable_scene.budget.save(path)
+            with open(path) as file:
+                self.assertEqual(json.load(file), budget)
+
+        self.assertIn(f'{totals["triangles"]} triangles', exportable_scene.budget.summary())
+
+    def test_budget_counts_every_render_group_once(self):
+        scene = bpy.context.scene
+        second_layer = scene.view_layers.new('Second layer')
+        self.addCleanup(scene.view_layers.remove, second_layer)
+
+        order = ramses_export.render_order.RenderOrderOptimizer.order
+        groups = []
+
+        def count_groups(render_order, slots, keep_order=False):
+            # Empty groups are destroyed again
+            if slots:
+                groups.append(slots)
+            return order(render_order, slots, keep_order=keep_order)
+
+        with unittest.mock.patch.object(ramses_export.render_order.RenderOrderOptimizer,
+                                        'order',
+                                        autospec=True,
+                                        side_effect=count_groups):
+            exporter = ramses_export.exporter.RamsesBlenderExporter([scene],
+                                                                    optimize_render_order=True,
+                                                                    collect_budget=True)
+            exporter.extract_from_blender_scene()
+            exporter.build_from_extracted_representations()
+
+        budget = exporter.get_exportable_scenes()[0].budget
+        self.assertEqual(len(budget.view_layers), 2)
+        # Every pass renders the same groups, they are not counted per pass
+        self.assertEqual(budget.totals.render_groups, len(groups))
+
+    def test_scenes_over_budget_are_not_saved(self):
+        scene = bpy.context.scene
+        limits = ramses_export.budget.BudgetLimits({'max_draw_calls': 1000,
+                                                    'scenes': {scene.name: {'max_triangles': 1}}})
+
+        output_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(output_dir.cleanup)
+
+        exporter = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes, budget_limits=limits)
+        exporter.extract_from_blender_scene()
+        with self.assertRaises(RuntimeError) as raised:
+            exporter.build_from_extracted_representations(output_dir=output_dir.name)
+
+        message = str(raised.exception)
+        self.assertIn(f'Scene "{scene.name}" is over budget', message)
+        self.assertIn('exceeds max_triangles = 1', message)
+        self.assertNotIn('max_draw_calls', message)
+        # The breakdown names the meshes responsible
+        for blender_object in scene.objects:
+            if blender_object.type == 'MESH':
+                self.assertIn(f'Mesh "{blender_object.name}"', message)
+        self.assertEqual(os.listdir(output_dir.name), [])
+
+        # Within budget, the export goes through
+        limits = ramses_export.budget.BudgetLimits({'max_node_depth': 1000})
+        exporter = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes, budget_limits=limits)
+        exporter.extract_from_blender_scene()
+        exporter.build_from_extracted_representations()
+        for exportable_scene in exporter.get_exportable_scenes():
+            self.assertGreater(exportable_scene.budget.totals.depth, 2)
+
+    def test_estimate_matches_the_export(self):
+        # N-gon caps, rotated about two axes
+        bpy.ops.mesh.primitive_cylinder_add(vertices=7, location=(3.0, 0.0, 0.0), rotation=(0.3, 0.0, 0.2))
+        cylinder = bpy.context.active_object
+        self.addCleanup(bpy.data.objects.remove, cylinder, do_unlink=True)
+
+        for compact_transforms, streaming in ((False, False), (True, False), (False, True)):
+            exporter = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes,
+                                                                    compact_transforms=compact_transforms,
+                                                                    collect_budget=True)
+            exporter.extract_from_blender_scene()
+            exporter.build_from_extracted_representations()
+
+            timings = ramses_export.instrumentation.TimingRecorder()
+            with timings.activate():
+                estimator = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes,
+                                                                         compact_transforms=compact_transforms,
+                                                                         streaming=streaming)
+                estimator.extract_from_blender_scene()
+                estimates = estimator.estimate()
+
+            # Neither RAMSES nor the geometry of any mesh was touched
+            self.assertIsNone(estimator._ramses)
+            spans = [timings.root]
+            while spans:
+                record = spans.pop()
+                self.assertNotEqual(record.name, 'MeshData.materialize')
+                spans.extend(record.children.values())
+
+            self.assertEqual(len(estimates), len(bpy.data.scenes))
+            for exportable_scene, estimate in zip(exporter.get_exportable_scenes(), estimates):
+                self.assertEqual(estimate.to_dict(), exportable_scene.budget.to_dict())
+
+
+
+class TestBudgetLimits(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def tearDown(self):
+        pass
+
+    def test_scene_limits_take_precedence(self):
+        limits = ramses_export.budget.BudgetLimits({'max_triangles': 100,
+                                                    'max_nodes': 10,
+                                                    'scenes': {'Cluster': {'max_triangles': 50}}})
+
+        self.assertEqual(limits.for_scene('Cluster'), {'max_triangles': 50, 'max_nodes': 10})
+        self.assertEqual(limits.for_scene('Other'), {'max_triangles': 100, 'max_nodes': 10})
+
+    def test_invalid_limits_are_rejected(self):
+        for limits in ({'max_triangle': 100},
+                       {'max_triangles': -1},
+                       {'max_triangles': '100'},
+                       {'scenes': {'Cluster': {'triangles': 1}}},
+                       {'scenes': []}):
+            with self.assertRaises(RuntimeError):
+                ramses_export.budget.BudgetLimits(limits)
+
+    def test_limits_are_loaded_from_json(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'budget.json')
+            with open(path, 'w') as file:
+                json.dump({'max_draw_calls': 200}, file)
+            self.assertEqual(ramses_export.budget.BudgetLimits.load(path).for_scene('Scene'), {'max_draw_calls': 200})
+
+            with open(path, 'w') as file:
+                file.write('{"max_draw_calls": ')
+            with self.assertRaises(RuntimeError):
+                ramses_export.budget.BudgetLimits.load(path)
+
+            with self.assertRaises(RuntimeError):
+                ramses_export.budget.BudgetLimits.load(os.path.join(directory, 'missing.json'))
+
+
+class TestRenderOrderOptimizer(unittest.TestCase):
+    def setUp(self):
+        self.optimizer = ramses_export.render_order.RenderOrderOptimizer()
+        self.first_effect = object()
+        self.second_effect = object()
+        self.geometry = (object(), object())
+
+        self.nodes = [ramses_export.intermediary_representation.Node(name=f'Mesh {i}') for i in range(3)]
+        for node, effect in zip(self.nodes, (self.first_effect, self.second_effect, self.first_effect)):
+            self.optimizer.record(node, effect, *self.geometry)
+
+        # Meshes interleave effects, a nested group sits in between
+        self.group = object()
+        self.slots = [(self.nodes[0], 'mesh 0'),
+                      (None, self.group),
+                      (self.nodes[1], 'mesh 1'),
+                      (self.nodes[2], 'mesh 2')]
+
+    def tearDown(self):
+        pass
+
+    def test_meshes_are_sorted_by_effect_around_nested_groups(self):
+        ordered = self.optimizer.order(self.slots)
+
+        self.assertEqual([slot[1] for slot in ordered], ['mesh 0', self.group, 'mesh 2', 'mesh 1'])
+        self.assertEqual(self.optimizer.effect_changes_before, 2)
+        self.assertEqual(self.optimizer.effect_changes_after, 1)
+        self.assertEqual(self.optimizer.geometry_changes_after, 0)
+
+    def test_keep_order_only_counts(self):
+        self.assertEqual(self.optimizer.order(self.slots, keep_order=True), self.slots)
+        self.assertEqual(self.optimizer.groups_kept, 1)
+        self.assertEqual(self.optimizer.effect_changes_after, self.optimizer.effect_changes_before)
+
+
+class TestTimingRecorder(ExporterTestBase, unittest.TestCase):
+    def __init__(self, methodName='runTest'):
+        unittest.TestCase.__init__(self, methodName)
+        ExporterTestBase.__init__(self)
+
+    def setUp(self):
+        bpy.ops.object.add(radius=1.0, type='CAMERA')
+        camera = bpy.context.active_object
+        for scene in bpy.data.scenes:
+            scene.camera = camera
+        self.addCleanup(bpy.data.objects.remove, camera, do_unlink=True)
+
+    def tearDown(self):
+        pass
+
+    def export(self, parallel=False) -> dict:
+        timings = ramses_export.instrumentation.TimingRecorder()
+
+        with timings.activate():
+            exporter = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes, parallel=parallel)
+            exporter.extract_from_blender_scene()
+            exporter.build_from_extracted_representations()
+
+        # The working directory must only hold the files run_all_tests.py expects
+        with tempfile.TemporaryDirectory() as output_dir:
+            path = os.path.join(output_dir, 'export_timings.json')
+            timings.save(path)
+            with open(path) as file:
+                return json.load(file)
+
+    def find_span(self, spans, *path):
+        for name in path:
+            found = [span for span in spans if span['name'] == name]
+            self.assertEqual(len(found), 1, f'{name} not in {[span["name"] for span in spans]}')
+            spans = found[0]['children']
+        return found[0]
+
+    def test_spans_are_nested_by_call(self):
+        for parallel in (False, True):
+            report = self.export(parallel=parallel)
+
+            self.find_span(report['spans'], 'RamsesBlenderExporter.extract_from_blender_scene', 'SceneRepresentation.build_ir')
+            build = self.find_span(report['spans'],
+                                   'RamsesBlenderExporter.build_from_extracted_representations',
+                                   'RamsesBlenderExporter.build_ramses_scene')
+            self.assertEqual(build['count'], len(bpy.data.scenes))
+
+            translate = self.find_span(build['children'],
+                                       'RamsesBlenderExporter._ramses_build_recursively',
+                                       'RamsesBlenderExporter.translate')
+            self.assertGreaterEqual(translate['count'], 1)
+            self.assertGreaterEqual(build['total_seconds'], translate['total_seconds'])
+
+    def test_trace_events_are_tagged_with_objects(self):
+        timings = ramses_export.instrumentation.TimingRecorder(trace=True)
+
+        with timings.activate():
+            exporter = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes)
+            exporter.extract_from_blender_scene()
+            exporter.build_from_extracted_representations()
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            path = os.path.join(output_dir, 'export_trace.json')
+            timings.save_trace(path)
+            with open(path) as file:
+                events = json.load(file)['traceEvents']
+
+        complete_events = [event for event in events if event['ph'] == 'X']
+        self.assertEqual(len(complete_events), sum(span.count for span in self.all_spans(timings.root)))
+
+        cube = bpy.data.objects['Cube']
+        cube_events = [event for event in complete_events if cube.name_full in event['args'].get('object', '')]
+        names = {event['name'] for event in cube_events}
+        self.assertIn('SceneGraph.add_node', names)
+        self.assertIn('RamsesBlenderExporter.translate', names)
+
+        materialized = [event for event in cube_events if event['name'] == 'MeshData.materialize']
+        self.assertEqual(len(materialized), 1)
+        self.assertEqual(materialized[0]['args']['vertices'], len(cube.data.vertices))
+
+        for event in complete_events:
+            self.assertGreaterEqual(event['dur'], 0)
+
+    def all_spans(self, record):
+        for child in record.children.values():
+            yield child
+            yield from self.all_spans(child)
+
+    def test_trace_needs_tracing_recorder(self):
+        with self.assertRaises(RuntimeError):
+            ramses_export.instrumentation.TimingRecorder().save_trace(os.path.join(self.working_dir, 'export_trace.json'))
+
+    def test_profiler_covers_parallel_workers(self):
+        profiler = ramses_export.instrumentation.ExportProfiler(top=10)
+
+        with profiler.activate():
+            exporter = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes, parallel=True)
+            exporter.extract_from_blender_scene()
+            exporter.build_from_extracted_representations()
+
+        profiled = {function_name for _, _, function_name in profiler.stats().stats}
+        self.assertIn('build_ramses_scene', profiled)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            profiler.save(output_dir)
+
+            for file_name in (profiler.PROFILE_FILE, profiler.PROFILE_REPORT_FILE, profiler.ALLOCATIONS_REPORT_FILE):
+                self.assertTrue(os.path.getsize(os.path.join(output_dir, file_name)) > 0)
+
+    def test_nothing_is_recorded_while_inactive(self):
+        timings = ramses_export.instrumentation.TimingRecorder()
+
+        exporter = ramses_export.exporter.RamsesBlenderExporter(bpy.data.scenes)
+        exporter.extract_from_blender_scene()
+        exporter.build_from_extracted_representations()
+
+        self.assertEqual(timings.to_dict()['spans'], [])
+        self.assertIsNone(ramses_export.instrumentation._active_recorder)
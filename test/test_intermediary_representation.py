@@ -11,8 +11,13 @@
 
 import unittest
 import bpy
+import os
+import shutil
+import tempfile
 from ramses_export.intermediary_representation import *
 import ramses_export.debug_utils
+import ramses_export.shaders
+import ramses_export.utils
 from ramses_export.test.exporter_test_base import ExporterTestBase
 
 
@@ -81,3 +86,327 @@ class TestFind(unittest.TestCase):
         blender_object = None
         found = self.node.find_from_blender_object(blender_object)
         self.assertEqual(found, [])
+
+    def test_find_matches_slots_ignoring_case(self):
+        self.assertFalse(hasattr(self.node, '__dict__'))
+
+        self.assertEqual(self.node.find('NAME', self.node.name), [self.node])
+        self.assertEqual(self.node.find('vertexformat', {'position': 'a_position'}), [])
+        self.assertEqual(self.node.find('not_an_attribute', self.node.name), [])
+
+
+class TestBufferExtraction(unittest.TestCase):
+    def setUp(self):
+        scene = bpy.context.scene
+
+        debug_utils.clear_scene(scene)
+        bpy.ops.mesh.primitive_cube_add()
+        self.node = MeshNode(blender_object=bpy.context.active_object)
+
+    def tearDown(self):
+        self.node.teardown()
+
+    def test_vertex_array_matches_vertices(self):
+        import numpy
+
+        positions = self.node.get_vertex_array()
+        expected = [component for vertex in self.node.blender_object.data.vertices for component in vertex.co]
+
+        self.assertEqual(positions.dtype, numpy.float32)
+        self.assertEqual(positions.tolist(), expected)
+
+    def test_index_array_is_triangulated(self):
+        import numpy
+
+        indices = self.node.get_index_array()
+
+        self.assertEqual(indices.dtype, numpy.uint32)
+        self.assertEqual(len(indices), 6 * 2 * 3) # Six quads, two triangles each
+        self.assertLess(int(indices.max()), len(self.node.blender_object.data.vertices))
+
+    def test_geometry_is_extracted_lazily(self):
+        self.assertFalse(self.node.mesh_data.is_materialized())
+
+        self.node.get_index_array()
+        self.assertTrue(self.node.mesh_data.is_materialized())
+
+    def test_release_geometry_keeps_counts(self):
+        self.node.get_index_array()
+        self.node.release_geometry()
+
+        self.assertFalse(self.node.mesh_data.is_materialized())
+        self.assertEqual(self.node.mesh_data.triangle_count(), 12)
+        self.assertFalse(self.node.mesh_data.is_materialized())
+
+    def test_bmesh_fallback_matches_loop_triangles(self):
+        bmesh_node = MeshNode(self.node.blender_object, mesh_cache=MeshDataCache(triangulation='BMESH'))
+
+        self.assertEqual(bmesh_node.get_vertex_array().tolist(), self.node.get_vertex_array().tolist())
+        self.assertEqual(len(bmesh_node.get_index_array()), len(self.node.get_index_array()))
+
+        bmesh_node.teardown()
+
+
+class TestSceneGraphIndex(unittest.TestCase):
+    def setUp(self):
+        scene = bpy.context.scene
+
+        debug_utils.clear_scene(scene)
+        bpy.ops.mesh.primitive_cube_add()
+        self.parent = bpy.context.active_object
+        bpy.ops.mesh.primitive_cube_add(location=(3.0, 0.0, 0.0))
+        self.child = bpy.context.active_object
+        self.child.parent = self.parent
+
+        self.graph = SceneGraph(scene)
+
+    def tearDown(self):
+        pass
+
+    def test_find_from_blender_object_returns_added_node(self):
+        parent_node = self.graph.add_node(self.parent)
+        child_node = self.graph.add_node(self.child)
+
+        self.assertEqual(self.graph.find_from_blender_object(self.parent), [parent_node])
+        self.assertEqual(self.graph.find_from_blender_object(self.child), [child_node])
+
+    def test_parenting_resolved_from_index(self):
+        parent_node = self.graph.add_node(self.parent)
+        child_node = self.graph.add_node(self.child)
+
+        self.assertIs(child_node.parent, parent_node)
+
+    def test_find_from_blender_object_None_returns_EmptyList(self):
+        self.graph.add_node(self.parent)
+        self.assertEqual(self.graph.find_from_blender_object(None), [])
+
+
+class TestMeshDataCache(unittest.TestCase):
+    def setUp(self):
+        scene = bpy.context.scene
+
+        debug_utils.clear_scene(scene)
+        bpy.ops.mesh.primitive_cube_add()
+        self.cube = bpy.context.active_object
+        # A linked duplicate, i.e. same mesh datablock
+        self.linked_cube = bpy.data.objects.new('Linked cube', self.cube.data)
+        scene.collection.objects.link(self.linked_cube)
+
+        self.cache = MeshDataCache()
+
+    def tearDown(self):
+        pass
+
+    def test_linked_duplicates_share_mesh_data(self):
+        node = MeshNode(self.cube, mesh_cache=self.cache)
+        linked_node = MeshNode(self.linked_cube, mesh_cache=self.cache)
+
+        self.assertIs(node.mesh_data, linked_node.mesh_data)
+        self.assertEqual(len(self.cache), 1)
+        self.assertIs(node.get_index_array(), linked_node.get_index_array())
+
+    def test_teardown_keeps_shared_mesh_data_alive(self):
+        node = MeshNode(self.cube, mesh_cache=self.cache)
+        linked_node = MeshNode(self.linked_cube, mesh_cache=self.cache)
+
+        node.teardown()
+        self.assertEqual(len(linked_node.get_indices()), 36) # 12 triangles
+
+        linked_node.teardown()
+        self.assertEqual(len(self.cache), 0)
+
+
+class TestViewLayerInstancing(unittest.TestCase):
+    def setUp(self):
+        scene = bpy.context.scene
+
+        debug_utils.clear_scene(scene)
+        bpy.ops.mesh.primitive_cube_add()
+        self.cube = bpy.context.active_object
+
+        self.representation = SceneRepresentation(scene)
+        self.representation.build_ir()
+
+    def tearDown(self):
+        self.representation.teardown()
+
+    def test_view_layers_reuse_extracted_mesh_data(self):
+        scene_graph_node = self.representation.graph.find_from_blender_object(self.cube)[0]
+
+        for layer in self.representation.layers:
+            layer_node = layer.find_from_blender_object(self.cube)[0]
+
+            self.assertIsNot(layer_node, scene_graph_node)
+            self.assertIs(layer_node.mesh_data, scene_graph_node.mesh_data)
+
+        self.assertEqual(len(self.representation.mesh_cache), 1)
+
+
+class TestShaderLibrary(unittest.TestCase):
+    def setUp(self):
+        scene = bpy.context.scene
+
+        debug_utils.clear_scene(scene)
+        bpy.ops.mesh.primitive_cube_add()
+        self.cube = bpy.context.active_object
+
+        # A copy, so its files can be changed
+        self.temporary_dir = tempfile.TemporaryDirectory()
+        self.shader_dir = os.path.join(self.temporary_dir.name, 'shader_library')
+        shutil.copytree(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'shader_library'), self.shader_dir)
+
+        self.params = ramses_export.utils.CustomParameters()
+        self.params.shader_dir = self.shader_dir
+        self.params.render_technique = 'red'
+        self.library = ramses_export.shaders.ShaderLibrary()
+
+    def tearDown(self):
+        self.temporary_dir.cleanup()
+
+    def extract(self):
+        representation = SceneRepresentation(bpy.context.scene,
+                                             {self.cube.name: self.params},
+                                             shader_library=self.library)
+        representation.build_ir()
+        node = representation.graph.find_from_blender_object(self.cube)[0]
+        shaders = (node.vertex_shader, node.fragment_shader)
+        representation.teardown()
+        return shaders
+
+    def test_shader_files_are_read_once_per_export(self):
+        first = self.extract()
+        second = self.extract()
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.library.misses, 1)
+        # Once for the scene graph and once for every view layer, every time
+        self.assertEqual(self.library.hits, 2 * (1 + len(bpy.context.scene.view_layers)) - 1)
+
+    def test_changed_files_are_read_again(self):
+        _, fragment_shader = self.extract()
+
+        path = os.path.join(self.shader_dir, 'red.frag')
+        with open(path) as file:
+            source = file.read()
+        with open(path, 'w') as file:
+            file.write(source.replace('vec4(1.0, 0.0, 0.0, 1.0)', 'vec4(0.5, 0.0, 0.0, 1.0)'))
+        # Same size, so only the modification time tells
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+        _, changed_fragment_shader = self.extract()
+
+        self.assertNotEqual(changed_fragment_shader, fragment_shader)
+        self.assertIn('0.5', changed_fragment_shader)
+        self.assertEqual(self.library.misses, 2)
+
+    def test_changed_includes_are_read_again(self):
+        vertex_shader, _ = self.extract()
+        self.assertIn('uniform highp mat4 u_ModelMatrix;', vertex_shader)
+
+        path = os.path.join(self.shader_dir, 'transforms.glsl')
+        with open(path, 'a') as file:
+            file.write('uniform highp float u_Scale;\n')
+
+        changed_vertex_shader, _ = self.extract()
+
+        self.assertIn('uniform highp float u_Scale;', changed_vertex_shader)
+        self.assertEqual(self.library.misses, 2)
+
+
+class TestGLSLPreprocessor(unittest.TestCase):
+    def setUp(self):
+        self.temporary_dir = tempfile.TemporaryDirectory()
+        self.include_dir = self.temporary_dir.name
+        self.preprocessor = ramses_export.shaders.GLSLPreprocessor()
+
+    def tearDown(self):
+        self.temporary_dir.cleanup()
+
+    def write(self, name, source):
+        with open(os.path.join(self.include_dir, name), 'w') as file:
+            file.write(source)
+
+    def test_comments_and_whitespace_are_stripped(self):
+        source = '#version 300 es\n\n// A comment\nvoid main()\n{\n\tint a = 1; /* and\n another */\n\tint b = a - -a;\n}\n'
+        processed, included = self.preprocessor.process(source)
+
+        self.assertEqual(processed, '#version 300 es\nvoid main()\n{\nint a=1;\nint b=a- -a;\n}\n')
+        self.assertEqual(included, [])
+
+    def test_formatting_does_not_matter(self):
+        first, _ = self.preprocessor.process('void main() { gl_Position = vec4(0.0); }')
+        second, _ = self.preprocessor.process('void main()\t{\r\n    gl_Position=vec4( 0.0 );  // Origin\r\n}')
+
+        self.assertEqual(first.replace('\n', ''), second.replace('\n', ''))
+
+    def test_macros_keep_their_parameters(self):
+        processed, _ = self.preprocessor.process('#define  F(x)  (x * 2)\n#define G (x)\n')
+
+        self.assertEqual(processed, '#define F(x) (x * 2)\n#define G (x)\n')
+
+    def test_includes_are_resolved_once(self):
+        self.write('common.glsl', 'uniform highp mat4 u_ModelMatrix;\n')
+        self.write('lighting.glsl', '#include "common.glsl"\nuniform vec3 u_Light;\n')
+        source = '#include "common.glsl"\n// #include "missing.glsl"\n#include "lighting.glsl"\nvoid main() {}\n'
+
+        processed, included = self.preprocessor.process(source, include_dir=self.include_dir)
+
+        self.assertEqual(processed, 'uniform highp mat4 u_ModelMatrix;\nuniform vec3 u_Light;\nvoid main(){}\n')
+        self.assertEqual([os.path.basename(path) for path in included], ['common.glsl', 'lighting.glsl'])
+
+    def test_missing_include_raises(self):
+        with self.assertRaises(RuntimeError):
+            self.preprocessor.process('#include "missing.glsl"\n', include_dir=self.include_dir)
+        with self.assertRaises(RuntimeError):
+            self.preprocessor.process('#include "common.glsl"\n')
+
+    def test_includes_outside_of_the_directory_raise(self):
+        self.write('outside.glsl', 'uniform vec3 u_Outside;\n')
+        library_dir = os.path.join(self.include_dir, 'library')
+        os.mkdir(library_dir)
+
+        for name in ('../outside.glsl', 'nested/../../outside.glsl', os.path.join(self.include_dir, 'outside.glsl')):
+            with self.assertRaises(RuntimeError):
+                self.preprocessor.process(f'#include "{name}"\n', include_dir=library_dir)
+
+
+class TestDeepHierarchy(unittest.TestCase):
+    def setUp(self):
+        import sys
+
+        # Deeper than any recursive implementation could go
+        self.depth = sys.getrecursionlimit() * 2
+        self.root = Node(name='Chain root')
+        self.deepest = self.root
+
+        for i in range(self.depth - 1):
+            child = Node(name=f'Chain node {i}')
+            self.deepest.add_child(child)
+            self.deepest = child
+
+    def tearDown(self):
+        pass
+
+    def test_traverse_keeps_preorder(self):
+        nodes = list(self.root.traverse())
+
+        self.assertEqual(len(nodes), self.depth)
+        self.assertIs(nodes[0], self.root)
+        self.assertIs(nodes[-1], self.deepest)
+
+    def test_traverse_post_order_visits_children_first(self):
+        nodes = list(self.root.traverse_post_order())
+
+        self.assertIs(nodes[0], self.deepest)
+        self.assertIs(nodes[-1], self.root)
+
+    def test_find_and_contains_reach_the_deepest_node(self):
+        self.assertEqual(self.root.find('name', self.deepest.name), [self.deepest])
+        self.assertTrue(self.root.contains(self.deepest))
+
+    def test_pretty_print_and_teardown(self):
+        graph = SceneGraph(bpy.context.scene, root=self.root)
+
+        self.assertEqual(graph.pretty_print_graph(self.root).count('\n'), self.depth)
+        graph.teardown()